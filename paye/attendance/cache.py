@@ -0,0 +1,224 @@
+"""
+Result cache for the Custom Shift Attendance report and the payroll attendance totals.
+
+Entries are keyed by the normalized filters (report) or the period and employee (totals).
+Changes are evicted by employee and date range (see hooks.py):
+
+- Employee Checkin, Attendance and Shift Assignment evict only the report entries whose
+  date range and employee filter cover the changed employee-days, and those employees'
+  totals of the overlapping periods
+- Shift Type changes affect every employee: the version stamp in every key is bumped
+
+Eviction runs again once the change is committed, so a request that read the old rows
+before the commit cannot keep them cached. Entries also expire after CACHE_TTL and the
+number of report entries is bounded.
+"""
+
+import hashlib
+import json
+import time
+
+import frappe
+from frappe.utils import add_days, cint, getdate
+
+VERSION_KEY = "paye_attendance_version"
+REPORT_CACHE = "paye_attendance_report"
+# Report key -> (from date, to date, employees or None for every employee)
+REPORT_INDEX = "paye_attendance_report_index"
+# One hash of employee -> shift -> seconds per period, listed in TOTALS_PERIODS
+TOTALS_CACHE = "paye_attendance_shift_totals"
+TOTALS_PERIODS = "paye_attendance_totals_periods"
+
+CACHE_TTL = 6 * 60 * 60
+MAX_REPORT_ENTRIES = 200
+# Larger results cost more Redis memory than recomputing them saves
+MAX_CACHED_ROWS = 20000
+
+DATE_FILTERS = ("from_date", "to_date")
+
+
+def is_enabled():
+    # Disabled by the benchmarks, their synthetic rows must not reach the site's cache
+    return not frappe.flags.paye_attendance_cache_disabled
+
+
+def get_version():
+    return cint(frappe.cache.get(frappe.cache.make_key(VERSION_KEY)))
+
+
+def invalidate(doc=None, method=None):
+    """doc_events handler: evict the changed employee-days now and again once committed"""
+    changes = get_changes(doc)
+    evict(changes)
+
+    # Until the commit other requests still read the old rows and could cache them
+    pending = getattr(frappe.local, "paye_attendance_cache_changes", None)
+    if pending is None:
+        pending = frappe.local.paye_attendance_cache_changes = []
+        frappe.db.after_commit.add(evict_after_commit)
+        frappe.db.after_rollback.add(clear_pending_changes)
+
+    # None means every employee
+    if changes is None or None in pending:
+        pending[:] = [None]
+    else:
+        pending.extend(changes)
+
+
+def invalidate_days(employees_by_date):
+    """Evict the given employee-days, for writes that bypass doc_events (bulk inserts)"""
+    evict([
+        (employee, add_days(attendance_date, -1), attendance_date)
+        for attendance_date, employees in employees_by_date.items()
+        for employee in employees
+    ])
+
+
+def evict_after_commit():
+    pending = frappe.local.paye_attendance_cache_changes
+    frappe.local.paye_attendance_cache_changes = None
+    evict(None if None in pending else pending)
+
+
+def clear_pending_changes():
+    frappe.local.paye_attendance_cache_changes = None
+
+
+def get_changes(doc):
+    """
+    (employee, from date, to date) ranges a document change affects; to date None is open
+    ended. None when every employee is affected.
+    """
+    if not doc or not doc.get("employee"):
+        return None
+
+    if doc.doctype == "Shift Assignment":
+        return [(doc.employee, getdate(doc.start_date), getdate(doc.end_date) if doc.end_date else None)]
+
+    if doc.doctype == "Attendance":
+        dates = [getdate(doc.attendance_date)]
+    else:
+        dates = [getdate(doc.time)]
+        previous = doc.get_doc_before_save()
+        if previous and previous.time:
+            dates.append(getdate(previous.time))
+
+    # A checkin after midnight can belong to the previous day's shift window
+    return [(doc.employee, add_days(date, -1), date) for date in dates]
+
+
+def evict(changes=None):
+    """Evict the entries covering changes, every entry when changes is None"""
+    if changes is None:
+        frappe.cache.incr(frappe.cache.make_key(VERSION_KEY))
+        frappe.cache.delete_value([REPORT_CACHE, REPORT_INDEX])
+        return
+
+    if not changes:
+        return
+
+    for key, (from_date, to_date, employees) in (frappe.cache.hgetall(REPORT_INDEX) or {}).items():
+        if any(overlaps(change, from_date, to_date, employees) for change in changes):
+            key = frappe.safe_decode(key)
+            frappe.cache.hdel(REPORT_CACHE, key)
+            frappe.cache.hdel(REPORT_INDEX, key)
+
+    for period in frappe.cache.hkeys(TOTALS_PERIODS) or []:
+        period = frappe.safe_decode(period)
+        start_date, end_date = (getdate(date) for date in period.split(":"))
+        for employee in {change[0] for change in changes if overlaps(change, start_date, end_date)}:
+            frappe.cache.hdel(get_totals_key(period), employee)
+
+
+def overlaps(change, from_date, to_date, employees=None):
+    employee, change_from, change_to = change
+    if employees is not None and employee not in employees:
+        return False
+    return change_from <= getdate(to_date) and (change_to is None or change_to >= getdate(from_date))
+
+
+def get_report_key(filters):
+    """Stable key of report filters; empty filters are dropped, dates and lists normalized"""
+    normalized = {}
+    for fieldname, value in filters.items():
+        if value in (None, "", [], ()):
+            continue
+        if fieldname in DATE_FILTERS:
+            value = str(getdate(value))
+        elif isinstance(value, list | tuple):
+            value = sorted(value)
+        normalized[fieldname] = value
+
+    normalized["consider_grace_period"] = 1 if filters.get("consider_grace_period", 1) else 0
+    payload = json.dumps(normalized, sort_keys=True, default=str)
+
+    return f"{get_version()}:{hashlib.sha1(payload.encode()).hexdigest()}"
+
+
+def get_report_employees(filters):
+    """Employees a report entry is limited to, None when it covers any employee"""
+    if filters.get("employee"):
+        return [filters["employee"]]
+    if filters.get("employees"):
+        return list(filters["employees"])
+    return None
+
+
+def get_cached_report(filters):
+    """Cached rows for the filters, None on a miss"""
+    if not is_enabled():
+        return None
+
+    entry = frappe.cache.hget(REPORT_CACHE, get_report_key(filters))
+    if not entry or entry[0] < time.time() - CACHE_TTL:
+        return None
+
+    return entry[1]
+
+
+def cache_report(filters, rows):
+    if not is_enabled() or len(rows) > MAX_CACHED_ROWS:
+        return
+
+    # Bounded: start over rather than tracking the least recently used entry
+    if len(frappe.cache.hkeys(REPORT_CACHE)) >= MAX_REPORT_ENTRIES:
+        frappe.cache.delete_value([REPORT_CACHE, REPORT_INDEX])
+
+    key = get_report_key(filters)
+    frappe.cache.hset(REPORT_INDEX, key, (
+        getdate(filters.get("from_date")), getdate(filters.get("to_date")), get_report_employees(filters)
+    ))
+    frappe.cache.hset(REPORT_CACHE, key, (time.time(), rows))
+    for name in (REPORT_CACHE, REPORT_INDEX):
+        frappe.cache.expire(frappe.cache.make_key(name), CACHE_TTL)
+
+
+def get_cached_attendance_seconds(start_date, end_date):
+    """Employee -> shift -> (overtime seconds, lateness seconds) already computed for the period"""
+    if not is_enabled():
+        return {}
+
+    cached = frappe.cache.hgetall(get_totals_key(get_period(start_date, end_date))) or {}
+    return {frappe.safe_decode(employee): seconds for employee, seconds in cached.items()}
+
+
+def cache_attendance_seconds(start_date, end_date, seconds):
+    """Add employees to the cached totals of the period"""
+    if not is_enabled() or not seconds:
+        return
+
+    period = get_period(start_date, end_date)
+    frappe.cache.hset(TOTALS_PERIODS, period, 1)
+    for employee, employee_seconds in seconds.items():
+        frappe.cache.hset(get_totals_key(period), employee, employee_seconds)
+
+    for name in (TOTALS_PERIODS, get_totals_key(period)):
+        frappe.cache.expire(frappe.cache.make_key(name), CACHE_TTL)
+
+
+def get_period(start_date, end_date):
+    return f"{getdate(start_date)}:{getdate(end_date)}"
+
+
+def get_totals_key(period):
+    return f"{TOTALS_CACHE}:{get_version()}:{period}"
@@ -0,0 +1,317 @@
+"""
+Memory-bounded export of the Custom Shift Attendance dataset for analytics tools.
+
+Rows are read one keyset page at a time and written straight to disk, so memory does not
+grow with the date range. Values stay typed (dates, datetimes, integer seconds) instead
+of the report's formatted strings.
+
+- CSV: one gzip-compressed file
+- Excel: one .xlsx workbook, streamed with openpyxl's write-only mode
+- Parquet: a dataset directory with one part file per page (needs pyarrow)
+
+After every page a checkpoint with the last (employee, attendance date) key is written
+next to the output; an interrupted CSV or Parquet export started again with the same
+filters continues from there. An .xlsx file cannot be appended to, Excel exports start over. Run from the command line with `bench --site <site> paye-export-attendance`.
+"""
+
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import zipfile
+
+import frappe
+from frappe import _
+from frappe.utils import getdate
+
+from paye.attendance.shift_rules import load_shift_rules
+
+EXPORT_FIELDS = (
+    "employee",
+    "employee_name",
+    "department",
+    "company",
+    "attendance_date",
+    "shift",
+    "attendance_status",
+    "first_checkin",
+    "last_checkin",
+    "checkin_count",
+    "working_seconds",
+    "late_entry_seconds",
+    "early_exit_seconds",
+    "over_time_seconds",
+    "actual_over_time_seconds",
+)
+
+FORMATS = ("CSV", "Excel", "Parquet")
+
+# Rows of an .xlsx sheet, the header included
+MAX_EXCEL_ROWS = 1048576
+
+
+def export_dataset(filters, path, file_format="CSV", page_size=None, resume=True):
+    """
+    Export the report dataset for filters to path (a .csv.gz file, an .xlsx file or a
+    Parquet directory). Returns the number of rows written in total, including earlier
+    attempts when resumed.
+    """
+    from paye.paye.report.custom_shift_attendance.custom_shift_attendance import (
+        STREAM_PAGE_SIZE,
+        iter_data,
+    )
+
+    if file_format not in FORMATS:
+        frappe.throw(_("Unsupported export format {0}").format(file_format))
+
+    filters = frappe._dict(filters)
+    page_size = page_size or STREAM_PAGE_SIZE
+    writer = WRITERS[file_format](path)
+
+    checkpoint = load_checkpoint(path, filters) if resume and writer.resumable else None
+    if checkpoint:
+        writer.resume(checkpoint["position"])
+    else:
+        writer.start()
+        checkpoint = {"filters": get_filters_hash(filters), "after": None, "rows": 0, "position": writer.position}
+
+    for rows in iter_data(filters, page_size, after=checkpoint["after"], shift_rules=load_shift_rules()):
+        writer.write([[row.get(fieldname) for fieldname in EXPORT_FIELDS] for row in rows])
+        checkpoint.update(
+            after=(rows[-1].employee, str(rows[-1].attendance_date)),
+            rows=checkpoint["rows"] + len(rows),
+            position=writer.position
+        )
+        if writer.resumable:
+            save_checkpoint(path, checkpoint)
+
+    writer.finish()
+    remove_checkpoint(path)
+    return checkpoint["rows"]
+
+
+class CSVWriter:
+    """Gzip CSV; position is the compressed size after the last complete page"""
+
+    resumable = True
+
+    def __init__(self, path):
+        self.path = path
+        self.position = 0
+
+    def start(self):
+        with gzip.open(self.path, "wt", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerow(EXPORT_FIELDS)
+        self.position = os.path.getsize(self.path)
+
+    def resume(self, position):
+        # Drop a page that was written after the last checkpoint
+        with open(self.path, "r+b") as f:
+            f.truncate(position)
+        self.position = position
+
+    def write(self, rows):
+        # Every page is a gzip member of its own, readers decompress them as one stream
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        with open(self.path, "ab") as f:
+            f.write(gzip.compress(buffer.getvalue().encode("utf-8")))
+        self.position = os.path.getsize(self.path)
+
+    def finish(self):
+        pass
+
+
+class ExcelWriter:
+    """
+    .xlsx workbook; write-only so rows are streamed to a temporary file instead of kept in
+    memory. Saved once at the end, position is the number of rows written
+    """
+
+    resumable = False
+
+    def __init__(self, path):
+        self.path = path
+        self.position = 0
+        self.workbook = self.sheet = None
+
+    def start(self):
+        from openpyxl import Workbook
+
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet("Custom Shift Attendance")
+        self.sheet.append(EXPORT_FIELDS)
+        self.position = 1
+
+    def write(self, rows):
+        if self.position + len(rows) > MAX_EXCEL_ROWS:
+            frappe.throw(_("More than {0} rows do not fit in an Excel sheet, export as CSV or Parquet").format(
+                MAX_EXCEL_ROWS - 1
+            ))
+
+        for row in rows:
+            self.sheet.append(row)
+        self.position += len(rows)
+
+    def finish(self):
+        self.workbook.save(self.path)
+
+
+class ParquetWriter:
+    """Parquet dataset directory; position is the number of part files written"""
+
+    resumable = True
+
+    def __init__(self, path):
+        try:
+            import pyarrow
+        except ImportError:
+            frappe.throw(_("Parquet export needs pyarrow, install it with `bench pip install pyarrow`"))
+
+        self.path = path
+        self.position = 0
+
+    def start(self):
+        os.makedirs(self.path, exist_ok=True)
+        for file_name in os.listdir(self.path):
+            if file_name.endswith(".parquet"):
+                os.remove(os.path.join(self.path, file_name))
+
+    def resume(self, position):
+        os.makedirs(self.path, exist_ok=True)
+        self.position = position
+
+    def write(self, rows):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # Fixed schema, every part file must have the same column types
+        table = pa.table(
+            {fieldname: [row[index] for row in rows] for index, fieldname in enumerate(EXPORT_FIELDS)},
+            schema=get_parquet_schema()
+        )
+        pq.write_table(table, os.path.join(self.path, f"part-{self.position:05d}.parquet"), compression="zstd")
+        self.position += 1
+
+    def finish(self):
+        pass
+
+
+WRITERS = {"CSV": CSVWriter, "Excel": ExcelWriter, "Parquet": ParquetWriter}
+
+
+def get_parquet_schema():
+    import pyarrow as pa
+
+    types = {
+        "attendance_date": pa.date32(),
+        "first_checkin": pa.timestamp("us"),
+        "last_checkin": pa.timestamp("us"),
+    }
+    return pa.schema([
+        (fieldname, types.get(fieldname, pa.int64() if fieldname.endswith(("_seconds", "_count")) else pa.string()))
+        for fieldname in EXPORT_FIELDS
+    ])
+
+
+def get_checkpoint_path(path):
+    return f"{path.rstrip(os.sep)}.checkpoint.json"
+
+
+def get_filters_hash(filters):
+    payload = json.dumps(filters, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def load_checkpoint(path, filters):
+    """Checkpoint of an interrupted export of the same filters, None otherwise"""
+    checkpoint_path = get_checkpoint_path(path)
+    if not os.path.exists(checkpoint_path) or not os.path.exists(path):
+        return None
+
+    with open(checkpoint_path) as f:
+        checkpoint = json.load(f)
+
+    return checkpoint if checkpoint.get("filters") == get_filters_hash(filters) else None
+
+
+def save_checkpoint(path, checkpoint):
+    # Written to a temporary file first so a crash never leaves a half written checkpoint
+    checkpoint_path = get_checkpoint_path(path)
+    with open(checkpoint_path + ".tmp", "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(checkpoint_path + ".tmp", checkpoint_path)
+
+
+def remove_checkpoint(path):
+    checkpoint_path = get_checkpoint_path(path)
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+
+@frappe.whitelist()
+def export_attendance_dataset(filters, file_format="CSV"):
+    """
+    Export the dataset to a private file in a background job. Calling again with the same
+    filters after an interrupted export resumes it.
+    """
+    from paye.paye.report.custom_shift_attendance.custom_shift_attendance import check_report_permission
+
+    check_report_permission()
+    if file_format not in FORMATS:
+        frappe.throw(_("Unsupported export format {0}").format(file_format))
+
+    filters = frappe.parse_json(filters)
+    for fieldname in ("from_date", "to_date"):
+        filters[fieldname] = str(getdate(filters[fieldname]))
+
+    export_id = get_filters_hash({**filters, "file_format": file_format, "user": frappe.session.user})[:12]
+    frappe.enqueue(
+        "paye.attendance.export.build_dataset_file",
+        queue="long",
+        timeout=4 * 60 * 60,
+        job_id=f"paye_attendance_dataset:{export_id}",
+        deduplicate=True,
+        filters=filters,
+        file_format=file_format,
+        export_id=export_id
+    )
+    frappe.msgprint(_("Export started, you will be notified when the file is ready"))
+
+
+def build_dataset_file(filters, file_format, export_id):
+    base_name = f"custom_shift_attendance_{export_id}"
+    if file_format == "CSV":
+        file_name = f"{base_name}.csv.gz"
+        export_dataset(filters, frappe.get_site_path("private", "files", file_name), "CSV")
+    elif file_format == "Excel":
+        file_name = f"{base_name}.xlsx"
+        export_dataset(filters, frappe.get_site_path("private", "files", file_name), "Excel")
+    else:
+        # Parts are packed into one download; they are compressed already
+        directory = frappe.get_site_path("private", "files", base_name)
+        export_dataset(filters, directory, "Parquet")
+        file_name = f"{base_name}.zip"
+        with zipfile.ZipFile(frappe.get_site_path("private", "files", file_name), "w", zipfile.ZIP_STORED) as archive:
+            for part in sorted(os.listdir(directory)):
+                archive.write(os.path.join(directory, part), part)
+                os.remove(os.path.join(directory, part))
+        os.rmdir(directory)
+
+    # The same filters export to the same file name, the File of an earlier export is reused
+    file_url = f"/private/files/{file_name}"
+    existing_file = frappe.db.exists("File", {"file_url": file_url})
+    if existing_file:
+        file_size = os.path.getsize(frappe.get_site_path("private", "files", file_name))
+        frappe.db.set_value("File", existing_file, "file_size", file_size)
+    else:
+        frappe.get_doc({
+            "doctype": "File",
+            "file_name": file_name,
+            "file_url": file_url,
+            "is_private": 1
+        }).insert(ignore_permissions=True)
+
+    frappe.publish_realtime("paye_attendance_export_ready", {"file_url": file_url}, user=frappe.session.user)
@@ -0,0 +1,199 @@
+"""
+Bulk Employee Checkin ingestion for biometric devices.
+
+One call takes a batch of punches and writes them with a constant number of queries:
+employees are mapped with one query, duplicates are found with one query, the names come
+from one reserved block of the Employee Checkin naming series and all rows are written with
+a multi-row insert. The Daily Attendance Summary of the touched employee-days is recomputed
+in the same transaction.
+"""
+
+import frappe
+from frappe import _
+from frappe.model.naming import parse_naming_series
+from frappe.utils import cint, get_datetime, getdate, now_datetime
+
+from paye.attendance.cache import invalidate_days
+from paye.attendance.shift_assignments import load_shift_index
+from paye.attendance.shift_rules import load_shift_rules
+from paye.attendance.shift_windows import find_window, has_timings
+
+MAX_BATCH_SIZE = 10000
+LOG_TYPES = ("IN", "OUT")
+
+
+@frappe.whitelist(methods=["POST"])
+def add_checkins(punches, employee_fieldname="attendance_device_id", skip_auto_attendance=0):
+    """
+    Insert a batch of punches, each a dict with employee_field_value, timestamp and optionally
+    device_id and log_type (same arguments as HRMS add_log_based_on_employee_field).
+    Returns the number inserted and the punches that were skipped, with the reason.
+    """
+    frappe.has_permission("Employee Checkin", "create", throw=True)
+
+    punches = frappe.parse_json(punches) or []
+    if len(punches) > MAX_BATCH_SIZE:
+        frappe.throw(_("At most {0} punches can be sent in one batch").format(MAX_BATCH_SIZE))
+    if employee_fieldname != "name" and not frappe.get_meta("Employee").has_field(employee_fieldname):
+        frappe.throw(_("Employee has no field {0}").format(employee_fieldname))
+
+    employees = get_employees(employee_fieldname, {punch.get("employee_field_value") for punch in punches})
+    checkins, skipped = [], []
+    seen = set()
+
+    for index, punch in enumerate(punches):
+        employee = employees.get(punch.get("employee_field_value"))
+        if not employee:
+            skipped.append({"index": index, "reason": "Unknown employee"})
+            continue
+
+        try:
+            time = get_datetime(punch.get("timestamp"))
+        except Exception:
+            time = None
+        if not time:
+            skipped.append({"index": index, "reason": "Invalid timestamp"})
+            continue
+
+        log_type = punch.get("log_type") or None
+        if log_type and log_type not in LOG_TYPES:
+            skipped.append({"index": index, "reason": "Invalid log type"})
+            continue
+
+        # Same punch sent twice in the batch
+        if (employee.name, time) in seen:
+            skipped.append({"index": index, "reason": "Duplicate"})
+            continue
+        seen.add((employee.name, time))
+
+        checkins.append(frappe._dict(
+            index=index, employee=employee.name, employee_name=employee.employee_name,
+            shift=employee.default_shift, time=time, log_type=log_type, device_id=punch.get("device_id")
+        ))
+
+    resolve_shifts(checkins)
+    existing = get_existing_checkins(checkins)
+    new_checkins = []
+    for checkin in checkins:
+        if (checkin.employee, checkin.time) in existing:
+            skipped.append({"index": checkin.index, "reason": "Duplicate"})
+        else:
+            new_checkins.append(checkin)
+
+    insert_checkins(new_checkins, cint(skip_auto_attendance))
+    return {"inserted": len(new_checkins), "skipped": sorted(skipped, key=lambda row: row["index"])}
+
+
+def get_employees(employee_fieldname, values):
+    """Employee field value -> active Employee"""
+    values = [value for value in values if value]
+    if not values:
+        return {}
+
+    rows = frappe.db.sql(f"""
+        SELECT name, employee_name, default_shift, `{employee_fieldname}` AS field_value
+        FROM `tabEmployee`
+        WHERE `{employee_fieldname}` IN %(values)s AND status = 'Active'
+    """, {"values": values}, as_dict=1)
+
+    return {row.field_value: row for row in rows}
+
+
+def resolve_shifts(checkins):
+    """Set the shift assigned to each checkin's employee on its day, else the default shift"""
+    if not checkins:
+        return
+
+    times = [checkin.time for checkin in checkins]
+    shift_index = load_shift_index(
+        getdate(min(times)),
+        getdate(max(times)),
+        list({checkin.employee for checkin in checkins}),
+        default_shifts={checkin.employee: checkin.shift for checkin in checkins}
+    )
+    for checkin in checkins:
+        checkin.shift = shift_index.get_shift(checkin.employee, checkin.time)
+
+
+def get_existing_checkins(checkins):
+    """(employee, time) of the batch that are already stored"""
+    if not checkins:
+        return set()
+
+    times = [checkin.time for checkin in checkins]
+    return set(frappe.db.sql("""
+        SELECT employee, time
+        FROM `tabEmployee Checkin`
+        WHERE employee IN %(employees)s
+            AND time BETWEEN %(from_time)s AND %(to_time)s
+    """, {
+        "employees": list({checkin.employee for checkin in checkins}),
+        "from_time": min(times),
+        "to_time": max(times),
+    }))
+
+
+def insert_checkins(checkins, skip_auto_attendance=0):
+    """Write checkins with one multi-row insert and recompute their employee-days"""
+    from paye.paye.doctype.daily_attendance_summary.daily_attendance_summary import recompute_days
+
+    if not checkins:
+        return
+
+    shift_rules = load_shift_rules(checkin.shift for checkin in checkins)
+    names = reserve_names(len(checkins))
+    now = now_datetime()
+    values = []
+
+    for name, checkin in zip(names, checkins, strict=True):
+        window = None
+        rule = shift_rules.get(checkin.shift)
+        if has_timings(rule):
+            window = find_window(checkin.time, rule, {})
+
+        values.append((
+            name, now, now, frappe.session.user, frappe.session.user,
+            checkin.employee, checkin.employee_name, checkin.log_type, checkin.time, checkin.device_id,
+            skip_auto_attendance,
+            # Same fields Employee Checkin fills from the shift window on save
+            checkin.shift if window else None,
+            window.shift_start if window else None,
+            window.shift_end if window else None,
+            window.opens if window else None,
+            window.closes if window else None,
+        ))
+
+    frappe.db.bulk_insert(
+        "Employee Checkin",
+        fields=[
+            "name", "creation", "modified", "owner", "modified_by",
+            "employee", "employee_name", "log_type", "time", "device_id", "skip_auto_attendance",
+            "shift", "shift_start", "shift_end", "shift_actual_start", "shift_actual_end",
+        ],
+        values=values
+    )
+
+    # doc_events do not run for the multi-row insert, update what they would have
+    employees_by_date = {}
+    for checkin in checkins:
+        employees_by_date.setdefault(getdate(checkin.time), set()).add(checkin.employee)
+    for attendance_date, employees in employees_by_date.items():
+        recompute_days(attendance_date, list(employees))
+
+    invalidate_days(employees_by_date)
+
+
+def reserve_names(count):
+    """count names of the Employee Checkin naming series, reserved with one update of tabSeries"""
+    autoname = frappe.get_meta("Employee Checkin").autoname or ""
+    if "." not in autoname or not autoname.endswith("#"):
+        return [frappe.generate_hash(length=10) for _ in range(count)]
+
+    series, digits = autoname.rsplit(".", 1)
+    prefix = parse_naming_series(series)
+
+    frappe.db.sql("INSERT IGNORE INTO `tabSeries` (name, current) VALUES (%s, 0)", prefix)
+    current = cint(frappe.db.sql("SELECT current FROM `tabSeries` WHERE name = %s FOR UPDATE", prefix)[0][0])
+    frappe.db.sql("UPDATE `tabSeries` SET current = %s WHERE name = %s", (current + count, prefix))
+
+    return [f"{prefix}{str(number).zfill(len(digits))}" for number in range(current + 1, current + count + 1)]
@@ -0,0 +1,122 @@
+from typing import NamedTuple
+
+from frappe.utils import get_time
+
+from paye.attendance.shift_rules import time_to_seconds
+
+
+class AttendanceRecord(NamedTuple):
+    """
+    One employee-day with integer seconds. Formatting to strings only happens when the
+    report renders it. A seconds value of None means it could not be determined
+    (e.g. a checkin exactly at midnight) and is left blank in the report.
+    """
+
+    employee: str
+    attendance_date: object
+    shift_type: str | None
+    shift_start: object
+    shift_end: object
+    first_checkin: object
+    last_checkin: object
+    working_seconds: int
+    late_entry_seconds: int | None
+    early_exit_seconds: int | None
+    over_time_seconds: int | None
+    actual_over_time_seconds: int | None
+
+
+def compute_record(row, shift_rule=None, consider_grace=True):
+    """Late entry, early exit and overtime of a grouped checkin row, in seconds"""
+    late_entry_grace_period = 0
+    early_exit_grace_period = 0
+    shift_start = shift_end = None
+
+    if row.get("shift_type"):
+        if shift_rule:
+            shift_start = shift_rule.start_time
+            shift_end = shift_rule.end_time
+            late_entry_grace_period = shift_rule.late_entry_grace_period
+            early_exit_grace_period = shift_rule.early_exit_grace_period
+    else:
+        shift_start = row.get("shift_start_time")
+        shift_end = row.get("shift_end_time")
+
+    shift_start = get_time(shift_start) if shift_start else None
+    shift_end = get_time(shift_end) if shift_end else None
+
+    working_seconds = row.get("working_seconds") or 0
+    late_seconds = early_seconds = overtime_seconds = actual_overtime_seconds = 0
+
+    if working_seconds and shift_start and shift_end:
+        in_seconds = time_to_seconds(row.get("in_time"))
+        out_seconds = time_to_seconds(row.get("out_time"))
+        shift_start_seconds = time_to_seconds(shift_start)
+        shift_end_seconds = time_to_seconds(shift_end)
+
+        # Late entry, counted from shift start once past the grace period
+        if row.get("in_time"):
+            late_threshold = shift_start_seconds + (late_entry_grace_period * 60 if consider_grace else 0)
+            late_seconds = max(in_seconds - shift_start_seconds, 0) if in_seconds > late_threshold else 0
+        else:
+            late_seconds = None
+
+        # Early exit, counted to shift end once past the grace period
+        if row.get("out_time"):
+            early_threshold = shift_end_seconds - (early_exit_grace_period * 60 if consider_grace else 0)
+            early_seconds = max(shift_end_seconds - out_seconds, 0) if out_seconds < early_threshold else 0
+        else:
+            early_seconds = None
+
+        # Regular overtime (beyond shift end)
+        if row.get("out_time") and shift_end_seconds:
+            overtime_seconds = max(out_seconds - shift_end_seconds, 0)
+        else:
+            overtime_seconds = None
+
+        # Actual overtime (based on shift duration)
+        if shift_start_seconds and shift_end_seconds:
+            actual_overtime_seconds = max(working_seconds - (shift_end_seconds - shift_start_seconds), 0)
+        else:
+            actual_overtime_seconds = None
+
+    return AttendanceRecord(
+        employee=row.get("employee"),
+        attendance_date=row.get("attendance_date"),
+        shift_type=row.get("shift_type"),
+        shift_start=shift_start,
+        shift_end=shift_end,
+        first_checkin=row.get("first_checkin"),
+        last_checkin=row.get("last_checkin"),
+        working_seconds=working_seconds,
+        late_entry_seconds=late_seconds,
+        early_exit_seconds=early_seconds,
+        over_time_seconds=overtime_seconds,
+        actual_over_time_seconds=actual_overtime_seconds
+    )
+
+
+def record_from_row(row):
+    """Record of a row whose seconds were computed by the database (SQL engine, daily summary)"""
+    shift_start = row.get("shift_start_time")
+    shift_end = row.get("shift_end_time")
+
+    return AttendanceRecord(
+        employee=row.get("employee"),
+        attendance_date=row.get("attendance_date"),
+        shift_type=row.get("shift_type"),
+        shift_start=get_time(shift_start) if shift_start else None,
+        shift_end=get_time(shift_end) if shift_end else None,
+        first_checkin=row.get("first_checkin"),
+        last_checkin=row.get("last_checkin"),
+        working_seconds=row.get("working_seconds") or 0,
+        late_entry_seconds=_to_int(row.get("late_entry_seconds")),
+        early_exit_seconds=_to_int(row.get("early_exit_seconds")),
+        over_time_seconds=_to_int(row.get("over_time_seconds")),
+        actual_over_time_seconds=_to_int(row.get("actual_over_time_seconds"))
+    )
+
+
+def _to_int(value):
+    # MariaDB returns Decimal for CASE expressions
+    return None if value is None else int(value)
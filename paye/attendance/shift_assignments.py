@@ -0,0 +1,146 @@
+"""
+Effective shift of an employee on a day, resolved from Shift Assignment in bulk.
+
+load_shift_index reads the submitted, active Shift Assignments of a set of employees and a
+date range with one query. Per employee they are flattened into sorted, non-overlapping
+date intervals, so "which shift applied to employee X on day D" is a binary search.
+Days without an assignment fall back to the employee's default shift.
+"""
+
+from bisect import bisect_right
+
+import frappe
+from frappe.utils import add_days, getdate
+
+
+class ShiftIndex:
+    """Employee -> sorted (starts, ends, shifts) intervals; an end of None is open ended"""
+
+    def __init__(self, assignments=(), default_shifts=None):
+        self.default_shifts = default_shifts or {}
+        self.intervals = {}
+
+        by_employee = {}
+        for assignment in assignments:
+            by_employee.setdefault(assignment.employee, []).append(assignment)
+        for employee, employee_assignments in by_employee.items():
+            self.intervals[employee] = get_intervals(employee_assignments)
+
+    def get_shift(self, employee, day):
+        """Shift that applied to employee on day, else the default shift"""
+        intervals = self.intervals.get(employee)
+        if intervals:
+            day = getdate(day)
+            starts, ends, shifts = intervals
+            index = bisect_right(starts, day) - 1
+            if index >= 0 and (ends[index] is None or day <= ends[index]):
+                return shifts[index]
+
+        return self.default_shifts.get(employee)
+
+    def get_period_shift(self, employee, start_date, end_date):
+        """Shift that applied to employee on most days of the period"""
+        start_date, end_date = getdate(start_date), getdate(end_date)
+        days = {}
+
+        intervals = self.intervals.get(employee)
+        if intervals:
+            starts, ends, shifts = intervals
+            index = max(bisect_right(starts, start_date) - 1, 0)
+            while index < len(starts) and starts[index] <= end_date:
+                overlap = (min(ends[index] or end_date, end_date) - max(starts[index], start_date)).days + 1
+                if overlap > 0:
+                    days[shifts[index]] = days.get(shifts[index], 0) + overlap
+                index += 1
+
+        # Days without an assignment count for the default shift
+        default_shift = self.default_shifts.get(employee)
+        unassigned = (end_date - start_date).days + 1 - sum(days.values())
+        if default_shift and unassigned > 0:
+            days[default_shift] = days.get(default_shift, 0) + unassigned
+
+        return max(days, key=days.get) if days else default_shift
+
+
+def get_intervals(assignments):
+    """
+    Flatten one employee's assignments into non-overlapping intervals. Where assignments
+    overlap the one that starts later applies; neighbours with the same shift are merged.
+    """
+    boundaries = sorted(
+        {getdate(assignment.start_date) for assignment in assignments}
+        | {add_days(getdate(assignment.end_date), 1) for assignment in assignments if assignment.end_date}
+    )
+
+    starts, ends, shifts = [], [], []
+    for index, boundary in enumerate(boundaries):
+        covering = [
+            assignment for assignment in assignments
+            if getdate(assignment.start_date) <= boundary
+            and (not assignment.end_date or boundary <= getdate(assignment.end_date))
+        ]
+        if not covering:
+            continue
+
+        shift = max(covering, key=lambda assignment: getdate(assignment.start_date)).shift_type
+        end = add_days(boundaries[index + 1], -1) if index + 1 < len(boundaries) else None
+        if shifts and shifts[-1] == shift and ends[-1] is not None and add_days(ends[-1], 1) == boundary:
+            ends[-1] = end
+            continue
+
+        starts.append(boundary)
+        ends.append(end)
+        shifts.append(shift)
+
+    return starts, ends, shifts
+
+
+def load_shift_index(from_date, to_date, employees=None, filters=None, default_shifts=None):
+    """
+    ShiftIndex of the Shift Assignments overlapping the range, for employees or for the
+    employees matching the report filters (employee, company, department).
+    Default shifts are loaded for employees when not passed in.
+    """
+    filters = filters or {}
+    conditions = []
+    values = {"from_date": from_date, "to_date": to_date, "employees": employees}
+
+    if employees is not None:
+        if not employees:
+            return ShiftIndex(default_shifts=default_shifts)
+        conditions.append("sa.employee IN %(employees)s")
+
+    for fieldname in ("employee", "company", "department"):
+        if filters.get(fieldname):
+            column = "sa.employee" if fieldname == "employee" else f"emp.{fieldname}"
+            conditions.append(f"{column} = %({fieldname})s")
+            values[fieldname] = filters[fieldname]
+
+    assignments = frappe.db.sql("""
+        SELECT sa.employee, sa.shift_type, sa.start_date, sa.end_date
+        FROM `tabShift Assignment` sa
+        {join}
+        WHERE sa.docstatus = 1
+            AND sa.status = 'Active'
+            AND sa.start_date <= %(to_date)s
+            AND (sa.end_date IS NULL OR sa.end_date >= %(from_date)s)
+            {conditions}
+    """.format(
+        join="INNER JOIN `tabEmployee` emp ON emp.name = sa.employee"
+            if filters.get("company") or filters.get("department") else "",
+        conditions="".join(f" AND {condition}" for condition in conditions)
+    ), values, as_dict=1)
+
+    if default_shifts is None and employees:
+        default_shifts = get_default_shifts(employees)
+
+    return ShiftIndex(assignments, default_shifts)
+
+
+def get_default_shifts(employees):
+    """Employee -> default Shift Type"""
+    return dict(frappe.db.sql("""
+        SELECT name, default_shift
+        FROM `tabEmployee`
+        WHERE name IN %(employees)s
+    """, {"employees": employees}))
@@ -0,0 +1,92 @@
+from typing import NamedTuple
+
+import frappe
+from frappe.utils import flt, get_time
+
+
+class ShiftRule(NamedTuple):
+    """Shift Type settings needed for attendance and payroll, resolved to seconds"""
+
+    name: str
+    start_time: object
+    end_time: object
+    start_seconds: int
+    end_seconds: int
+    late_entry_grace_period: int
+    early_exit_grace_period: int
+    checkin_before_seconds: int
+    checkout_after_seconds: int
+    overtime_pay: float
+    lateness_fine: float
+    overtime_salary_component: str | None
+    lateness_salary_component: str | None
+
+
+def load_shift_rules(shift_types=None):
+    """
+    Load the given Shift Types (all of them if not given) with a single query.
+    Returns a dict of Shift Type name -> ShiftRule.
+    """
+    if shift_types is not None:
+        shift_types = [shift_type for shift_type in set(shift_types) if shift_type]
+        if not shift_types:
+            return {}
+
+    rows = frappe.db.sql("""
+        SELECT
+            name,
+            start_time,
+            end_time,
+            late_entry_grace_period,
+            early_exit_grace_period,
+            begin_check_in_before_shift_start_time,
+            allow_check_out_after_shift_end_time,
+            custom_overtime_pay,
+            custom_lateness_fine,
+            custom_overtime_salary_component,
+            custom_lateness_salary_component
+        FROM
+            `tabShift Type`
+        {condition}
+    """.format(condition="WHERE name IN %(shift_types)s" if shift_types is not None else ""),
+        {"shift_types": shift_types}, as_dict=1)
+
+    return {row.name: compile_shift_rule(row) for row in rows}
+
+
+def compile_shift_rule(row):
+    start_time = get_time(row.start_time) if row.start_time else None
+    end_time = get_time(row.end_time) if row.end_time else None
+
+    return ShiftRule(
+        name=row.name,
+        start_time=start_time,
+        end_time=end_time,
+        start_seconds=time_to_seconds(start_time),
+        end_seconds=time_to_seconds(end_time),
+        late_entry_grace_period=row.late_entry_grace_period or 0,
+        early_exit_grace_period=row.early_exit_grace_period or 0,
+        # Shift Type keeps the checkin window margins in minutes
+        checkin_before_seconds=(row.begin_check_in_before_shift_start_time or 0) * 60,
+        checkout_after_seconds=(row.allow_check_out_after_shift_end_time or 0) * 60,
+        overtime_pay=flt(row.custom_overtime_pay),
+        lateness_fine=flt(row.custom_lateness_fine),
+        overtime_salary_component=row.custom_overtime_salary_component,
+        lateness_salary_component=row.custom_lateness_salary_component
+    )
+
+
+def time_to_seconds(value):
+    """Seconds since midnight of a time, timedelta or time string"""
+    if value is None:
+        return 0
+    elif hasattr(value, "seconds"):  # It's a timedelta
+        return value.seconds
+    elif hasattr(value, "hour"):  # It's a time object
+        return value.hour * 3600 + value.minute * 60 + value.second
+    else:
+        try:
+            t = get_time(value)
+            return t.hour * 3600 + t.minute * 60 + t.second
+        except Exception:
+            return 0
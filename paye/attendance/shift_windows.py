@@ -0,0 +1,167 @@
+"""
+Shift-window engine: checkins belong to the shift window they fall in rather than to their
+calendar date, so the punches of a night shift after midnight count for the day it started.
+
+A window runs from the shift start less the Shift Type's "begin check-in before" margin to
+the shift end plus its "allow check-out after" margin, and ends on the next day when the
+shift crosses midnight. Checkins are read once, ordered by employee and time, and grouped
+in a single sweep; only the part of the next day that a window can reach is scanned.
+"""
+
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+from frappe.utils import getdate
+
+from paye.attendance.records import AttendanceRecord
+
+DAY_SECONDS = 24 * 60 * 60
+
+
+class ShiftWindow(NamedTuple):
+    attendance_date: object
+    shift_start: datetime
+    shift_end: datetime
+    opens: datetime
+    closes: datetime
+
+
+class ShiftDay:
+    """Checkins of one employee assigned to one attendance date"""
+
+    __slots__ = ("attendance_date", "checkin_count", "employee", "first_checkin", "last_checkin", "shift",
+        "source", "window")
+
+    def __init__(self, checkin, attendance_date, shift, window):
+        self.employee = checkin.employee
+        self.attendance_date = attendance_date
+        self.shift = shift
+        self.window = window
+        self.first_checkin = self.last_checkin = checkin.time
+        self.checkin_count = 1
+        # First checkin row, carries the employee details
+        self.source = checkin
+
+
+def get_shift_end_seconds(rule):
+    """End of the shift in seconds from the start day's midnight"""
+    if rule.end_seconds <= rule.start_seconds:
+        return rule.end_seconds + DAY_SECONDS
+    return rule.end_seconds
+
+
+def has_timings(rule):
+    # 00:00 is a valid start or end, only a missing time means no timings
+    return bool(rule and rule.start_time is not None and rule.end_time is not None)
+
+
+def get_window(rule, attendance_date):
+    midnight = datetime.combine(attendance_date, datetime.min.time())
+    shift_start = midnight + timedelta(seconds=rule.start_seconds)
+    shift_end = midnight + timedelta(seconds=get_shift_end_seconds(rule))
+
+    return ShiftWindow(
+        attendance_date,
+        shift_start,
+        shift_end,
+        shift_start - timedelta(seconds=rule.checkin_before_seconds),
+        shift_end + timedelta(seconds=rule.checkout_after_seconds)
+    )
+
+
+def get_scan_bounds(from_date, to_date, shift_rules):
+    """
+    Checkin times that can belong to attendance dates from_date..to_date: whole calendar
+    days, widened only as far as the earliest window opening and the latest closing.
+    """
+    rules = [rule for rule in shift_rules.values() if has_timings(rule)]
+    earliest = min([rule.start_seconds - rule.checkin_before_seconds for rule in rules] + [0])
+    latest = max([get_shift_end_seconds(rule) + rule.checkout_after_seconds for rule in rules] + [DAY_SECONDS])
+
+    start = datetime.combine(getdate(from_date), datetime.min.time()) + timedelta(seconds=earliest)
+    end = datetime.combine(getdate(to_date), datetime.min.time()) + timedelta(seconds=latest)
+    return start, end
+
+
+def iter_shift_days(checkins, shift_rules):
+    """
+    Group checkins into ShiftDays in one pass. checkins must be ordered by employee and time
+    and have employee, time and shift; a checkin outside every window of its shift (or
+    without one) goes to its calendar date.
+    """
+    windows = {}
+    current = None
+
+    for checkin in checkins:
+        rule = shift_rules.get(checkin.shift)
+        window = find_window(checkin.time, rule, windows) if has_timings(rule) else None
+        attendance_date = window.attendance_date if window else checkin.time.date()
+
+        if current and current.employee == checkin.employee and current.attendance_date == attendance_date:
+            current.last_checkin = checkin.time
+            current.checkin_count += 1
+            continue
+
+        if current:
+            yield current
+        current = ShiftDay(checkin, attendance_date, checkin.shift, window)
+
+    if current:
+        yield current
+
+
+def find_window(checkin_time, rule, windows):
+    """Window of the checkin's own day, of the previous day (night shifts) or of the next day"""
+    day = checkin_time.date()
+    for attendance_date in (day, day - timedelta(days=1), day + timedelta(days=1)):
+        key = (rule.name, attendance_date)
+        if key not in windows:
+            windows[key] = get_window(rule, attendance_date)
+
+        window = windows[key]
+        if window.opens <= checkin_time <= window.closes:
+            return window
+
+    return None
+
+
+def compute_window_record(day, rule=None, consider_grace=True):
+    """Late entry, early exit and overtime of a ShiftDay relative to its shift window"""
+    working_seconds = int((day.last_checkin - day.first_checkin).total_seconds())
+    late_seconds = early_seconds = overtime_seconds = actual_overtime_seconds = 0
+    window = day.window
+
+    if working_seconds and window:
+        late_threshold = window.shift_start + timedelta(
+            minutes=rule.late_entry_grace_period if consider_grace else 0
+        )
+        if day.first_checkin > late_threshold:
+            late_seconds = seconds_between(window.shift_start, day.first_checkin)
+
+        early_threshold = window.shift_end - timedelta(
+            minutes=rule.early_exit_grace_period if consider_grace else 0
+        )
+        if day.last_checkin < early_threshold:
+            early_seconds = seconds_between(day.last_checkin, window.shift_end)
+
+        overtime_seconds = seconds_between(window.shift_end, day.last_checkin)
+        actual_overtime_seconds = max(working_seconds - seconds_between(window.shift_start, window.shift_end), 0)
+
+    return AttendanceRecord(
+        employee=day.employee,
+        attendance_date=day.attendance_date,
+        shift_type=rule.name if rule else None,
+        shift_start=rule.start_time if window else None,
+        shift_end=rule.end_time if window else None,
+        first_checkin=day.first_checkin,
+        last_checkin=day.last_checkin,
+        working_seconds=working_seconds,
+        late_entry_seconds=late_seconds,
+        early_exit_seconds=early_seconds,
+        over_time_seconds=overtime_seconds,
+        actual_over_time_seconds=actual_overtime_seconds
+    )
+
+
+def seconds_between(start, end):
+    return max(int((end - start).total_seconds()), 0)
@@ -0,0 +1,169 @@
+from datetime import datetime, timedelta
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from paye.paye.doctype.daily_attendance_summary.daily_attendance_summary import get_unsummarized_days_query
+from paye.paye.report.custom_shift_attendance.custom_shift_attendance import (
+    GROUP_LEVELS,
+    get_checkin_query,
+    get_engine_query,
+    get_grouped_query,
+    get_payroll_query,
+    get_query_values,
+)
+from paye.payroll.attendance import get_summary_seconds_query
+
+# Aliases of the large tables that must be read through an index
+INDEXED_TABLES = ("ci", "att", "s")
+# Table each engine reads its days from
+ENGINE_TABLES = {"Python": "ci", "SQL": "ci", "Daily Summary": "s"}
+
+EMPLOYEES = [f"_T-PAYE-PLAN-{index:03d}" for index in range(50)]
+FROM_DATE = datetime(2026, 1, 1)
+DAYS = 60
+PERIOD = {"from_date": "2026-02-01", "to_date": "2026-02-28"}
+
+
+class TestQueryPlan(FrappeTestCase):
+    """
+    EXPLAIN the attendance report and payroll reads so query edits cannot silently fall
+    back to full table scans. Rows are seeded so the optimizer sees a realistic spread.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        seed_attendance_rows()
+
+    def test_report_engines(self):
+        for engine in ("Python", "SQL", "Daily Summary"):
+            for filters in get_report_filters():
+                with self.subTest(engine=engine, filters=filters):
+                    filters = frappe._dict(filters, engine=engine)
+                    self.assertIndexed(
+                        get_engine_query(filters, engine), get_query_values(filters), ENGINE_TABLES[engine]
+                    )
+
+    def test_keyset_pages(self):
+        for engine in ("Python", "SQL", "Daily Summary"):
+            with self.subTest(engine=engine):
+                filters = frappe._dict(PERIOD, engine=engine, after_employee=EMPLOYEES[10], after_date=PERIOD["from_date"])
+                self.assertIndexed(
+                    get_engine_query(filters, engine, order_by="employee, attendance_date", limit=500),
+                    get_query_values(filters),
+                    ENGINE_TABLES[engine]
+                )
+
+    def test_shift_window_engine(self):
+        for filters in get_report_filters():
+            with self.subTest(filters=filters):
+                filters = frappe._dict(filters, engine="Shift Window")
+                values = dict(
+                    get_query_values(filters),
+                    scan_start=f"{PERIOD['from_date']} 00:00:00",
+                    scan_end=f"{PERIOD['to_date']} 23:59:59"
+                )
+                self.assertIndexed(get_checkin_query(filters), values, "ci")
+
+    def test_shift_window_chunks(self):
+        filters = frappe._dict(PERIOD, engine="Shift Window", after_employee=EMPLOYEES[10], after_date=PERIOD["from_date"])
+        values = dict(
+            get_query_values(filters),
+            scan_start=f"{PERIOD['from_date']} 00:00:00",
+            scan_end=f"{PERIOD['to_date']} 23:59:59",
+            resume_time=f"{PERIOD['from_date']} 00:00:00",
+            last_employee=EMPLOYEES[20],
+            last_time=f"{PERIOD['from_date']} 18:00:00",
+            last_name=f"{EMPLOYEES[20]}-20260201-1",
+            chunk_size=5000
+        )
+        self.assertIndexed(get_checkin_query(filters, after_checkin=True, chunked=True), values, "ci")
+
+    def test_grouped_report(self):
+        for engine in ("SQL", "Daily Summary"):
+            for group_by, level in GROUP_LEVELS.items():
+                with self.subTest(engine=engine, group_by=group_by):
+                    filters = frappe._dict(PERIOD, engine=engine, group_by=group_by)
+                    self.assertIndexed(
+                        get_grouped_query(filters, level, engine), get_query_values(filters), ENGINE_TABLES[engine]
+                    )
+
+    def test_payroll_reads(self):
+        values = dict(PERIOD, employees=EMPLOYEES[:5], consider_grace=1)
+        self.assertIndexed(get_payroll_query(values), values, "ci")
+        self.assertIndexed(get_summary_seconds_query(), values, "s")
+        self.assertIndexed(get_unsummarized_days_query(values["employees"]), values, "ci")
+
+    def assertIndexed(self, query, values, table):
+        """
+        No large table is scanned, and table is actually read through a key: a plan the
+        optimizer cut short (e.g. "Impossible WHERE") reads no table at all
+        """
+        plan = frappe.db.sql("EXPLAIN " + query, values, as_dict=1)
+        self.assertEqual(get_unindexed_tables(plan), [], plan)
+        self.assertTrue(any(row.table == table and row.get("key") for row in plan), plan)
+
+
+def get_unindexed_tables(plan):
+    """Large tables read with a full table or full index scan instead of an index lookup"""
+    return [
+        row.table for row in plan
+        if row.table in INDEXED_TABLES and row.get("type") in ("ALL", "index") and not row.get("key")
+    ]
+
+
+def get_report_filters():
+    return (
+        PERIOD,
+        dict(PERIOD, employee=EMPLOYEES[0]),
+        dict(PERIOD, employees=EMPLOYEES[:5]),
+    )
+
+
+def seed_attendance_rows():
+    now = frappe.utils.now_datetime()
+    employees, checkins, attendance, summaries = [], [], [], []
+
+    for employee in EMPLOYEES:
+        # The report queries inner join Employee, without it the optimizer sees an empty result
+        employees.append((employee, now, now, employee, employee, "Active", "Male", "1990-01-01", "2020-01-01"))
+        for day in range(DAYS):
+            date = FROM_DATE + timedelta(days=day)
+            first_checkin = date + timedelta(hours=9)
+            last_checkin = date + timedelta(hours=18)
+            for index, time in enumerate((first_checkin, last_checkin)):
+                checkins.append((
+                    f"{employee}-{date:%Y%m%d}-{index}", now, now, employee, time, "IN" if index == 0 else "OUT", 0
+                ))
+            attendance.append((f"{employee}-{date:%Y%m%d}", now, now, employee, date.date(), "Present", 1))
+            summaries.append((
+                f"{employee}-{date.date()}", now, now, employee, date.date(), first_checkin, last_checkin, 2, 9 * 3600
+            ))
+
+    frappe.db.bulk_insert(
+        "Employee",
+        fields=[
+            "name", "creation", "modified", "first_name", "employee_name", "status", "gender",
+            "date_of_birth", "date_of_joining"
+        ],
+        values=employees
+    )
+    frappe.db.bulk_insert(
+        "Employee Checkin",
+        fields=["name", "creation", "modified", "employee", "time", "log_type", "skip_auto_attendance"],
+        values=checkins
+    )
+    frappe.db.bulk_insert(
+        "Attendance",
+        fields=["name", "creation", "modified", "employee", "attendance_date", "status", "docstatus"],
+        values=attendance
+    )
+    frappe.db.bulk_insert(
+        "Daily Attendance Summary",
+        fields=[
+            "name", "creation", "modified", "employee", "attendance_date",
+            "first_checkin", "last_checkin", "checkin_count", "working_seconds"
+        ],
+        values=summaries
+    )
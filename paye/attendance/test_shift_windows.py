@@ -0,0 +1,111 @@
+import unittest
+from datetime import date, datetime
+
+import frappe
+
+from paye.attendance.shift_rules import compile_shift_rule
+from paye.attendance.shift_windows import find_window, get_scan_bounds, has_timings, iter_shift_days
+
+
+def get_rule(name, start_time, end_time, checkin_before=60, checkout_after=60):
+    return compile_shift_rule(frappe._dict(
+        name=name,
+        start_time=start_time,
+        end_time=end_time,
+        late_entry_grace_period=0,
+        early_exit_grace_period=0,
+        begin_check_in_before_shift_start_time=checkin_before,
+        allow_check_out_after_shift_end_time=checkout_after,
+    ))
+
+
+def get_checkins(shift, *times, employee="EMP-1"):
+    return [frappe._dict(employee=employee, shift=shift, time=datetime.fromisoformat(time)) for time in times]
+
+
+class TestShiftWindows(unittest.TestCase):
+    def setUp(self):
+        self.shift_rules = {
+            rule.name: rule for rule in (
+                get_rule("Day", "09:00:00", "18:00:00"),
+                get_rule("Evening", "16:00:00", "00:00:00"),
+                get_rule("Midnight", "00:00:00", "08:00:00"),
+                get_rule("Night", "22:00:00", "06:00:00"),
+            )
+        }
+
+    def test_midnight_is_a_timing(self):
+        self.assertTrue(has_timings(self.shift_rules["Evening"]))
+        self.assertTrue(has_timings(self.shift_rules["Midnight"]))
+        self.assertFalse(has_timings(get_rule("Open", None, None)))
+        self.assertFalse(has_timings(None))
+
+    def test_shift_ending_at_midnight(self):
+        days = list(iter_shift_days(
+            get_checkins("Evening", "2024-01-01 16:00:00", "2024-01-02 00:45:00"), self.shift_rules
+        ))
+
+        self.assertEqual(len(days), 1)
+        self.assertEqual(days[0].attendance_date, date(2024, 1, 1))
+        self.assertEqual(days[0].checkin_count, 2)
+        self.assertEqual(days[0].window.shift_end, datetime(2024, 1, 2))
+
+    def test_shift_starting_at_midnight(self):
+        # Opens an hour before midnight, on the previous calendar day
+        days = list(iter_shift_days(
+            get_checkins("Midnight", "2024-01-01 23:30:00", "2024-01-02 08:10:00"), self.shift_rules
+        ))
+
+        self.assertEqual(len(days), 1)
+        self.assertEqual(days[0].attendance_date, date(2024, 1, 2))
+        self.assertEqual(days[0].window.shift_start, datetime(2024, 1, 2))
+
+    def test_night_shift_crossing_midnight(self):
+        days = list(iter_shift_days(
+            get_checkins(
+                "Night", "2024-01-01 21:30:00", "2024-01-02 02:00:00", "2024-01-02 06:30:00", "2024-01-02 21:45:00"
+            ),
+            self.shift_rules
+        ))
+
+        self.assertEqual([day.attendance_date for day in days], [date(2024, 1, 1), date(2024, 1, 2)])
+        self.assertEqual([day.checkin_count for day in days], [3, 1])
+
+    def test_checkins_on_window_edges(self):
+        rule = self.shift_rules["Evening"]
+        windows = {}
+
+        opens = find_window(datetime(2024, 1, 1, 15), rule, windows)
+        closes = find_window(datetime(2024, 1, 2, 1), rule, windows)
+
+        self.assertEqual(opens.attendance_date, date(2024, 1, 1))
+        self.assertEqual(closes.attendance_date, date(2024, 1, 1))
+        self.assertIsNone(find_window(datetime(2024, 1, 2, 1, 0, 1), rule, windows))
+
+    def test_checkin_outside_every_window_keeps_its_calendar_date(self):
+        days = list(iter_shift_days(get_checkins("Day", "2024-01-01 03:00:00"), self.shift_rules))
+
+        self.assertEqual(days[0].attendance_date, date(2024, 1, 1))
+        self.assertIsNone(days[0].window)
+
+    def test_checkins_without_shift_use_calendar_dates(self):
+        days = list(iter_shift_days(
+            get_checkins(None, "2024-01-01 23:00:00", "2024-01-02 01:00:00"), self.shift_rules
+        ))
+
+        self.assertEqual([day.attendance_date for day in days], [date(2024, 1, 1), date(2024, 1, 2)])
+
+    def test_employees_are_not_merged(self):
+        checkins = get_checkins("Evening", "2024-01-01 16:00:00") + get_checkins(
+            "Evening", "2024-01-01 23:00:00", employee="EMP-2"
+        )
+
+        days = list(iter_shift_days(checkins, self.shift_rules))
+
+        self.assertEqual([day.employee for day in days], ["EMP-1", "EMP-2"])
+
+    def test_scan_bounds_reach_past_midnight(self):
+        start, end = get_scan_bounds("2024-01-01", "2024-01-31", {"Evening": self.shift_rules["Evening"]})
+
+        self.assertEqual(start, datetime(2024, 1, 1))
+        self.assertEqual(end, datetime(2024, 2, 1, 1))
@@ -0,0 +1,373 @@
+"""
+Benchmarks for the attendance report and the salary slip attendance path.
+
+Run offline against an in-process stand-in for frappe.db:
+
+    bench --site <site> paye-benchmark --employees 500 --days 31 --offline
+
+or against the site's database (synthetic checkins are rolled back afterwards):
+
+    bench --site <site> paye-benchmark --employees 500 --days 31
+"""
+
+import random
+import statistics
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import NamedTuple
+
+import frappe
+
+
+class SyntheticShift(NamedTuple):
+    name: str
+    start_seconds: int
+    end_seconds: int
+    late_entry_grace_period: int
+    early_exit_grace_period: int
+    overtime_pay: float = 100.0
+    lateness_fine: float = 50.0
+
+
+DEFAULT_SHIFTS = (
+    SyntheticShift("Bench Day", 9 * 3600, 17 * 3600, 15, 15),
+    SyntheticShift("Bench Morning", 6 * 3600, 14 * 3600, 10, 10),
+    SyntheticShift("Bench Evening", 14 * 3600, 22 * 3600, 10, 10),
+)
+
+
+class SyntheticDay(NamedTuple):
+    employee: str
+    attendance_date: date
+    shift: SyntheticShift
+    punches: tuple
+
+
+def generate_days(
+    employees=100,
+    days=30,
+    shifts=DEFAULT_SHIFTS,
+    late_ratio=0.2,
+    overtime_ratio=0.15,
+    punches_per_day=2,
+    start_date=None,
+    employee_names=None,
+    seed=42,
+):
+    """
+    Yield one SyntheticDay per employee and day. Shifts are assigned round-robin, a share
+    of days arrives late (past the grace period) and a share leaves after the shift end.
+    """
+    rng = random.Random(seed)
+    start_date = start_date or date(2026, 1, 1)
+    employee_names = employee_names or [f"BENCH-EMP-{i:05d}" for i in range(employees)]
+
+    for index, employee in enumerate(employee_names[:employees]):
+        shift = shifts[index % len(shifts)]
+        for offset in range(days):
+            day = start_date + timedelta(days=offset)
+            midnight = datetime.combine(day, datetime.min.time())
+
+            if rng.random() < late_ratio:
+                in_seconds = shift.start_seconds + shift.late_entry_grace_period * 60 + rng.randint(60, 3600)
+            else:
+                in_seconds = shift.start_seconds - rng.randint(0, 900)
+
+            if rng.random() < overtime_ratio:
+                out_seconds = shift.end_seconds + rng.randint(60, 3 * 3600)
+            else:
+                out_seconds = shift.end_seconds - rng.randint(-300, 600)
+
+            # Intermediate punches (breaks) between the first and the last one
+            inner = sorted(rng.randint(in_seconds + 1, out_seconds - 1) for _ in range(max(punches_per_day - 2, 0)))
+            punches = tuple(midnight + timedelta(seconds=s) for s in (in_seconds, *inner, out_seconds))
+
+            yield SyntheticDay(employee, day, shift, punches)
+
+
+def to_report_row(day):
+    """Row shaped like the output of the report query for one employee-day"""
+    first, last = day.punches[0], day.punches[-1]
+    return frappe._dict(
+        employee=day.employee,
+        employee_name=day.employee,
+        department=None,
+        company=None,
+        attendance_date=day.attendance_date,
+        shift=day.shift.name,
+        attendance_id=None,
+        attendance_status=None,
+        first_checkin=first,
+        last_checkin=last,
+        checkin_count=len(day.punches),
+        in_time=timedelta(hours=first.hour, minutes=first.minute, seconds=first.second),
+        out_time=timedelta(hours=last.hour, minutes=last.minute, seconds=last.second),
+        working_seconds=int((last - first).total_seconds()),
+        shift_start_time=timedelta(seconds=day.shift.start_seconds),
+        shift_end_time=timedelta(seconds=day.shift.end_seconds),
+        shift_type=day.shift.name,
+    )
+
+
+def to_shift_type_row(shift):
+    """Row shaped like the output of the load_shift_rules query"""
+    return frappe._dict(
+        name=shift.name,
+        start_time=timedelta(seconds=shift.start_seconds),
+        end_time=timedelta(seconds=shift.end_seconds),
+        late_entry_grace_period=shift.late_entry_grace_period,
+        early_exit_grace_period=shift.early_exit_grace_period,
+        begin_check_in_before_shift_start_time=60,
+        allow_check_out_after_shift_end_time=60,
+        custom_overtime_pay=shift.overtime_pay,
+        custom_lateness_fine=shift.lateness_fine,
+        custom_overtime_salary_component="Overtime",
+        custom_lateness_salary_component="Lateness",
+    )
+
+
+class StubDB:
+    """
+    In-process stand-in for frappe.db serving the attendance queries from synthetic data.
+    Only the queries of the Python engine and the payroll totals are supported.
+    """
+
+    def __init__(self, days, shifts=DEFAULT_SHIFTS):
+        self.report_rows = [to_report_row(day) for day in days]
+        self.shift_rows = [to_shift_type_row(shift) for shift in shifts]
+        self.default_shifts = {row.employee: row.shift for row in self.report_rows}
+        self.summary_rows = self._get_summary_rows()
+        self.queries = 0
+
+    def _get_summary_rows(self):
+        from paye.attendance.records import compute_record
+        from paye.attendance.shift_rules import compile_shift_rule
+
+        shift_rules = {row.name: compile_shift_rule(row) for row in self.shift_rows}
+        rows = []
+        for row in self.report_rows:
+            record = compute_record(row, shift_rules.get(row.shift_type))
+            rows.append(frappe._dict(
+                employee=record.employee,
+                attendance_date=row.attendance_date,
+                shift=row.shift_type,
+                over_time_seconds=record.over_time_seconds or 0,
+                late_entry_seconds=record.late_entry_seconds or 0,
+            ))
+
+        return rows
+
+    def sql(self, query, values=None, as_dict=0, as_iterator=False, **kwargs):
+        self.queries += 1
+        values = values or {}
+        employees = set(values.get("employees") or ([values["employee"]] if values.get("employee") else []))
+
+        # Synthetic days are all in the summary
+        if "NOT EXISTS" in query:
+            return []
+
+        if "`tabEmployee Checkin`" in query:
+            return [
+                frappe._dict(row) for row in self.report_rows
+                if not employees or row.employee in employees
+            ]
+
+        # Synthetic days are never dirty
+        if "is_dirty = 1" in query:
+            return []
+
+        if "`tabDaily Attendance Summary`" in query:
+            return [row for row in self.summary_rows if row.employee in employees]
+
+        if "`tabShift Type`" in query:
+            return list(self.shift_rows)
+
+        if "`tabEmployee`" in query:
+            return [(employee, self.default_shifts.get(employee)) for employee in employees]
+
+        return []
+
+    @contextmanager
+    def unbuffered_cursor(self):
+        yield
+
+
+@contextmanager
+def use_db(db):
+    previous = getattr(frappe.local, "db", None)
+    frappe.local.db = db
+    try:
+        with attendance_cache_disabled():
+            yield
+    finally:
+        frappe.local.db = previous
+
+
+@contextmanager
+def attendance_cache_disabled():
+    # Synthetic rows must not reach the site's attendance cache, it survives the rollback
+    frappe.flags.paye_attendance_cache_disabled = True
+    try:
+        yield
+    finally:
+        frappe.flags.paye_attendance_cache_disabled = False
+
+
+@contextmanager
+def measure(results, phase):
+    """Record wall time and peak traced memory of a phase"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        yield results.setdefault(phase, {})
+    finally:
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[phase].update(seconds=round(elapsed, 4), peak_memory_mb=round(peak / 1024 / 1024, 2))
+
+
+def summarize_latencies(latencies):
+    if not latencies:
+        return {}
+
+    ordered = sorted(latencies)
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p95_ms": round(ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def run_offline(employees=100, days=30, **generator_options):
+    """Benchmark the Python engine and the per-slip payroll totals against StubDB"""
+    from paye.paye.report.custom_shift_attendance.custom_shift_attendance import (
+        get_attendance_records,
+        get_data,
+    )
+    from paye.payroll.attendance import get_attendance_totals
+
+    synthetic_days = list(generate_days(employees=employees, days=days, **generator_options))
+    db = StubDB(synthetic_days)
+    start_date, end_date = synthetic_days[0].attendance_date, synthetic_days[-1].attendance_date
+    employee_names = list(db.default_shifts)
+    results = {}
+
+    with use_db(db):
+        with measure(results, "report") as phase:
+            rows = get_data(frappe._dict(from_date=start_date, to_date=end_date, engine="Python"))
+            phase["rows"] = len(rows)
+        results["report"]["rows_per_second"] = round(len(rows) / (results["report"]["seconds"] or 1e-9))
+
+        with measure(results, "records") as phase:
+            records = get_attendance_records(frappe._dict(from_date=start_date, to_date=end_date, engine="Python"))
+            phase["rows"] = len(records)
+        results["records"]["rows_per_second"] = round(len(records) / (results["records"]["seconds"] or 1e-9))
+
+        latencies = []
+        with measure(results, "salary_slip_attendance") as phase:
+            for employee in employee_names:
+                start = time.perf_counter()
+                get_attendance_totals([employee], start_date, end_date)
+                latencies.append(time.perf_counter() - start)
+            phase.update(summarize_latencies(latencies))
+
+        with measure(results, "payroll_batch_attendance") as phase:
+            get_attendance_totals(employee_names, start_date, end_date)
+            phase["employees"] = len(employee_names)
+
+    results["queries"] = db.queries
+    return results
+
+
+@attendance_cache_disabled()
+def run_local(employees=100, days=30, slips=50, **generator_options):
+    """
+    Benchmark against the site's database. Synthetic checkins are inserted for existing
+    employees and rolled back at the end; draft salary slips are validated without saving.
+    """
+    from paye.paye.doctype.daily_attendance_summary.daily_attendance_summary import rebuild_daily_summary
+    from paye.paye.report.custom_shift_attendance.custom_shift_attendance import get_data
+
+    employee_names = frappe.get_all("Employee", filters={"status": "Active"}, pluck="name", limit=employees)
+    shift_names = frappe.get_all("Shift Type", pluck="name")
+    if not employee_names or not shift_names:
+        frappe.throw("Local benchmark needs at least one active Employee and one Shift Type")
+
+    shifts = [to_synthetic_shift(name) for name in shift_names]
+    synthetic_days = list(generate_days(
+        employees=len(employee_names),
+        days=days,
+        shifts=shifts,
+        employee_names=employee_names,
+        **generator_options
+    ))
+    start_date, end_date = synthetic_days[0].attendance_date, synthetic_days[-1].attendance_date
+    results = {}
+
+    try:
+        insert_checkins(synthetic_days)
+
+        for engine in ("Python", "SQL", "Shift Window"):
+            phase_name = f"report_{frappe.scrub(engine)}"
+            with measure(results, phase_name) as phase:
+                rows = get_data(frappe._dict(from_date=start_date, to_date=end_date, engine=engine))
+                phase["rows"] = len(rows)
+            results[phase_name]["rows_per_second"] = round(len(rows) / (results[phase_name]["seconds"] or 1e-9))
+
+        with measure(results, "summary_rebuild"):
+            rebuild_daily_summary(start_date, end_date, employees=employee_names)
+
+        with measure(results, "report_daily_summary") as phase:
+            rows = get_data(frappe._dict(from_date=start_date, to_date=end_date, engine="Daily Summary"))
+            phase["rows"] = len(rows)
+
+        latencies = []
+        with measure(results, "salary_slip_validate") as phase:
+            for name in frappe.get_all("Salary Slip", filters={"docstatus": 0}, pluck="name", limit=slips):
+                slip = frappe.get_doc("Salary Slip", name)
+                start = time.perf_counter()
+                slip.validate()
+                latencies.append(time.perf_counter() - start)
+            phase.update(summarize_latencies(latencies))
+    finally:
+        frappe.db.rollback()
+
+    return results
+
+
+def to_synthetic_shift(shift_type):
+    from paye.attendance.shift_rules import load_shift_rules
+
+    rule = load_shift_rules([shift_type])[shift_type]
+    return SyntheticShift(
+        rule.name,
+        rule.start_seconds,
+        rule.end_seconds,
+        rule.late_entry_grace_period,
+        rule.early_exit_grace_period,
+        rule.overtime_pay,
+        rule.lateness_fine,
+    )
+
+
+def insert_checkins(synthetic_days):
+    now = datetime.now()
+    values = []
+    for day in synthetic_days:
+        for punch in day.punches:
+            values.append((
+                frappe.generate_hash(length=12), now, now, "Administrator", "Administrator",
+                day.employee, punch, day.shift.name, "IN" if punch == day.punches[0] else "OUT", 0
+            ))
+
+    frappe.db.bulk_insert(
+        "Employee Checkin",
+        fields=["name", "creation", "modified", "owner", "modified_by",
+            "employee", "time", "shift", "log_type", "skip_auto_attendance"],
+        values=values
+    )
@@ -0,0 +1,75 @@
+import json
+
+import click
+from frappe.commands import get_site, pass_context
+
+
+@click.command("paye-benchmark")
+@click.option("--employees", default=100, help="Number of employees")
+@click.option("--days", default=30, help="Number of days per employee")
+@click.option("--late-ratio", default=0.2, help="Share of late arrivals")
+@click.option("--overtime-ratio", default=0.15, help="Share of days with overtime")
+@click.option("--punches-per-day", default=2, help="Checkins per employee-day")
+@click.option("--offline", is_flag=True, default=False, help="Use an in-process stand-in for the database")
+@pass_context
+def paye_benchmark(context, employees, days, late_ratio, overtime_ratio, punches_per_day, offline):
+    """Benchmark the attendance report and the salary slip attendance path"""
+    import frappe
+
+    from paye.benchmarks.attendance import run_local, run_offline
+
+    options = {
+        "employees": employees,
+        "days": days,
+        "late_ratio": late_ratio,
+        "overtime_ratio": overtime_ratio,
+        "punches_per_day": punches_per_day,
+    }
+
+    frappe.init(site=get_site(context))
+    try:
+        if offline:
+            results = run_offline(**options)
+        else:
+            frappe.connect()
+            results = run_local(**options)
+    finally:
+        frappe.destroy()
+
+    click.echo(json.dumps(results, indent=2, default=str))
+
+
+@click.command("paye-export-attendance")
+@click.option("--from-date", required=True, help="First attendance date")
+@click.option("--to-date", required=True, help="Last attendance date")
+@click.option("--output", required=True, help="Output .csv.gz or .xlsx file, or directory for Parquet")
+@click.option("--format", "file_format", type=click.Choice(["CSV", "Excel", "Parquet"]), default="CSV")
+@click.option("--engine", default="Daily Summary", help="Calculation engine of the report")
+@click.option("--company", help="Only employees of this company")
+@click.option("--employee", help="Only this employee")
+@click.option("--page-size", default=5000, help="Rows read and written per page")
+@click.option("--no-resume", is_flag=True, default=False, help="Start over instead of resuming an interrupted export")
+@pass_context
+def paye_export_attendance(context, from_date, to_date, output, file_format, engine, company, employee, page_size, no_resume):
+    """Export the Custom Shift Attendance dataset for analytics tools"""
+    import frappe
+
+    from paye.attendance.export import export_dataset
+
+    filters = {"from_date": from_date, "to_date": to_date, "engine": engine}
+    if company:
+        filters["company"] = company
+    if employee:
+        filters["employee"] = employee
+
+    frappe.init(site=get_site(context))
+    try:
+        frappe.connect()
+        rows = export_dataset(filters, output, file_format, page_size=page_size, resume=not no_resume)
+    finally:
+        frappe.destroy()
+
+    click.echo(f"Exported {rows} rows to {output}")
+
+
+commands = [paye_benchmark, paye_export_attendance]
@@ -83,7 +83,7 @@ app_license = "mit"
 # ------------
 
 # before_install = "paye.install.before_install"
-# after_install = "paye.install.after_install"
+after_install = "paye.install.after_install"
 
 # Uninstallation
 # ------------
@@ -147,6 +147,46 @@ override_doctype_class = {
 # 	}
 # }
 
+doc_events = {
+    "Employee Checkin": {
+        # on_update also runs after insert
+        "on_update": [
+            "paye.paye.doctype.daily_attendance_summary.daily_attendance_summary.update_for_checkin",
+            "paye.attendance.cache.invalidate"
+        ],
+        "after_delete": [
+            "paye.paye.doctype.daily_attendance_summary.daily_attendance_summary.remove_for_checkin",
+            "paye.attendance.cache.invalidate"
+        ]
+    },
+    "Attendance": {
+        "on_update": "paye.attendance.cache.invalidate",
+        "on_submit": "paye.attendance.cache.invalidate",
+        "on_cancel": "paye.attendance.cache.invalidate",
+        "after_delete": "paye.attendance.cache.invalidate"
+    },
+    "Shift Assignment": {
+        "on_update": "paye.attendance.cache.invalidate",
+        "on_submit": "paye.attendance.cache.invalidate",
+        "on_update_after_submit": "paye.attendance.cache.invalidate",
+        "on_cancel": "paye.attendance.cache.invalidate",
+        "after_delete": "paye.attendance.cache.invalidate"
+    },
+    "Additional Salary": {
+        "on_cancel": "paye.payroll.additional_salary.release_attendance_key"
+    },
+    "Salary Slip": {
+        "on_cancel": "paye.paye.doctype.attendance_period_snapshot.attendance_period_snapshot.delete_snapshot"
+    },
+    "Shift Type": {
+        "on_update": [
+            "paye.paye.doctype.daily_attendance_summary.daily_attendance_summary.update_for_shift_type",
+            "paye.attendance.cache.invalidate"
+        ],
+        "after_delete": "paye.attendance.cache.invalidate"
+    }
+}
+
 # Scheduled Tasks
 # ---------------
 
@@ -168,6 +208,13 @@ override_doctype_class = {
 # 	],
 # }
 
+scheduler_events = {
+    # Safety net for dirty attendance days whose recompute job was lost
+    "all": [
+        "paye.paye.doctype.daily_attendance_summary.daily_attendance_summary.process_dirty_days"
+    ]
+}
+
 # Testing
 # -------
 
@@ -199,12 +246,12 @@ override_doctype_class = {
 # Request Events
 # ----------------
 # before_request = ["paye.utils.before_request"]
-# after_request = ["paye.utils.after_request"]
+after_request = ["paye.instrumentation.flush"]
 
 # Job Events
 # ----------
 # before_job = ["paye.utils.before_job"]
-# after_job = ["paye.utils.after_job"]
+after_job = ["paye.instrumentation.flush"]
 
 # User Data Protection
 # --------------------
@@ -253,7 +300,7 @@ fixtures = [
                 "name",
                 "in",
                 [
-                    "Company-enable_13th_month_tax",  "Shift Type-custom_overtime_pay", "Shift Type-custom_lateness_fine", "Shift Type-custom_lateness_salary_component", "Shift Type-custom_overtime_salary_component", "Salary Slip-custom_total_overtime", "Salary Slip-custom_total_lateness"
+                    "Company-enable_13th_month_tax",  "Shift Type-custom_overtime_pay", "Shift Type-custom_lateness_fine", "Shift Type-custom_lateness_salary_component", "Shift Type-custom_overtime_salary_component", "Salary Slip-custom_total_overtime", "Salary Slip-custom_total_lateness", "Additional Salary-custom_paye_attendance_key"
                 ]
             ]
         ]
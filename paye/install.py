@@ -0,0 +1,15 @@
+import frappe
+
+
+def after_install():
+    add_attendance_indexes()
+
+
+def add_attendance_indexes():
+    """Composite indexes for the access paths of the Custom Shift Attendance query"""
+    # Per-employee reads (payroll, summary refresh, keyset pages): employee = ?, time range
+    frappe.db.add_index("Employee Checkin", ["employee", "skip_auto_attendance", "time"], "paye_employee_time_index")
+    # Company-wide reads: skip_auto_attendance = 0, time range
+    frappe.db.add_index("Employee Checkin", ["skip_auto_attendance", "time"], "paye_skip_auto_attendance_time_index")
+    # Attendance status join on (employee, attendance_date)
+    frappe.db.add_index("Attendance", ["employee", "attendance_date"], "paye_employee_attendance_date_index")
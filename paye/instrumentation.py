@@ -0,0 +1,133 @@
+"""
+Timing and query counts of the attendance and payroll hot paths.
+
+Functions decorated with instrument() add their wall time to a run that lives for the
+current request or background job. After the request/job (see hooks.py) the
+run is written as one JSON line to the "paye.performance" log: totals per phase and the
+slowest employees. Phase totals are inclusive, e.g. salary_slip.validate contains the
+tax projection. Phases are whole calls (a report run, a slip validation), never per row.
+Queries are counted for the run as a whole from the MariaDB session counter, read once
+when the run starts and once when it is written, so instrumented calls add no queries.
+Disable with `"paye_disable_performance_log": 1` in site_config.json.
+"""
+
+import functools
+import json
+import time
+
+import frappe
+from frappe.utils import cint
+
+SLOWEST_EMPLOYEES = 10
+
+
+class PerformanceRun:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.started_queries = read_query_counter()
+        self.depth = 0
+        self.phases = {}
+        self.employees = {}
+
+    def add(self, phase, seconds, employee=None):
+        totals = self.phases.setdefault(phase, {"calls": 0, "seconds": 0.0})
+        totals["calls"] += 1
+        totals["seconds"] += seconds
+
+        if employee:
+            self.employees[employee] = self.employees.get(employee, 0.0) + seconds
+
+    def get_queries(self):
+        """Statements sent since the run started, None when they cannot be counted"""
+        finished_queries = read_query_counter()
+        if self.started_queries is None or finished_queries is None:
+            return None
+        # The closing counter read counts itself
+        return max(finished_queries - self.started_queries - 1, 0)
+
+    def as_dict(self, source=None):
+        slowest = sorted(self.employees.items(), key=lambda item: item[1], reverse=True)
+        return {
+            "source": source,
+            "site": frappe.local.site,
+            "user": frappe.session.user if getattr(frappe.local, "session", None) else None,
+            "seconds": round(time.perf_counter() - self.started, 4),
+            "queries": self.get_queries(),
+            "phases": {
+                phase: {**totals, "seconds": round(totals["seconds"], 4)}
+                for phase, totals in self.phases.items()
+            },
+            "employees": len(self.employees),
+            "slowest_employees": [
+                {"employee": employee, "seconds": round(seconds, 4)}
+                for employee, seconds in slowest[:SLOWEST_EMPLOYEES]
+            ],
+        }
+
+
+def read_query_counter():
+    """
+    Statements sent on this connection, from the server's session counter so frappe.db.sql
+    is left untouched. None without a MariaDB connection (Postgres, connection closed).
+    """
+    if getattr(frappe.local, "db", None) is None or getattr(frappe.db, "db_type", None) != "mariadb":
+        return None
+
+    try:
+        return cint(frappe.db.sql("SHOW SESSION STATUS LIKE 'Questions'")[0][1])
+    except Exception:
+        return None
+
+
+def is_enabled():
+    return not frappe.conf.get("paye_disable_performance_log")
+
+
+def get_run():
+    run = getattr(frappe.local, "paye_performance_run", None)
+    if run is None:
+        run = frappe.local.paye_performance_run = PerformanceRun()
+    return run
+
+
+def instrument(phase, get_employee=None):
+    """
+    Time calls of the decorated function as phase. get_employee receives the call's
+    arguments and returns the employee to charge; only outermost instrumented calls are
+    charged so nested phases are not counted twice.
+    """
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not is_enabled():
+                return fn(*args, **kwargs)
+
+            run = get_run()
+            start = time.perf_counter()
+            run.depth += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                run.depth -= 1
+                employee = get_employee(*args, **kwargs) if get_employee and not run.depth else None
+                run.add(phase, time.perf_counter() - start, employee)
+
+        return wrapper
+
+    return decorator
+
+
+def flush(method=None, **kwargs):
+    """after_request / after_job: write the run of this request or job to the performance log"""
+    run = getattr(frappe.local, "paye_performance_run", None)
+    if run is None:
+        return
+
+    frappe.local.paye_performance_run = None
+    if not run.phases:
+        return
+
+    request = getattr(frappe.local, "request", None)
+    source = method or (getattr(frappe.local, "form_dict", None) or {}).get("cmd") or getattr(request, "path", None)
+    frappe.logger("paye.performance", allow_site=True).info(json.dumps(run.as_dict(source), default=str))
@@ -1,12 +1,26 @@
+import re
+
 import frappe
-from hrms.payroll.doctype.salary_slip.salary_slip import SalarySlip
+from hrms.payroll.doctype.salary_slip.salary_slip import SalarySlip, get_salary_component_data
+
+from paye.instrumentation import instrument
+
+# Duration parts as produced by frappe.utils.format_duration
+DAYS_PATTERN = re.compile(r'(\d+)d')
+HOURS_PATTERN = re.compile(r'(\d+)h')
+MINUTES_PATTERN = re.compile(r'(\d+)m')
+SECONDS_PATTERN = re.compile(r'(\d+)s')
+
+def get_slip_employee(slip, *args, **kwargs):
+    return slip.employee
 
 class CustomSalarySlip(SalarySlip):
+    @instrument("salary_slip.compute_taxable_earnings", get_slip_employee)
     def compute_current_and_future_taxable_earnings(self):
         super().compute_current_and_future_taxable_earnings()
         
         # Check if feature is enabled for the company
-        if frappe.db.get_value("Company", self.company, "enable_13th_month_tax"):
+        if self.get_payroll_context().company.enable_13th_month_tax:
             self.add_13th_month_projection()
 
     def add_13th_month_projection(self):
@@ -21,168 +35,108 @@ class CustomSalarySlip(SalarySlip):
         self.future_structured_taxable_earnings += one_month_taxable
         self.future_structured_taxable_earnings_before_exemption += one_month_taxable_before_exemption
     
+    @instrument("salary_slip.validate", get_slip_employee)
     def validate(self):
         super().validate()
-        
-        # Import the execute function
-        from paye.paye.report.custom_shift_attendance.custom_shift_attendance import execute
 
-        filters = {
-            "employee": self.employee,
-            "from_date": self.start_date,
-            "to_date": self.end_date
-        }
+        # Overtime and lateness were added to earnings/deductions by add_additional_salary_components
+        totals = self.get_attendance_totals()
+        if totals.overtime_amount > 0:
+            self.custom_total_overtime = frappe.utils.format_duration(totals.overtime_seconds)
+        if totals.lateness_amount > 0:
+            self.custom_total_lateness = frappe.utils.format_duration(totals.lateness_seconds)
 
-        # Get the result without unpacking first
-        result = execute(filters)
-        
-        if isinstance(result, tuple):
-            if len(result) == 2:
-                columns, data = result
-                # frappe.log_error("data", data)
-            elif len(result) == 3:
-                columns, data, message = result
-            elif len(result) == 4:
-                columns, data, message, chart = result
-            else:
-                frappe.log_error("unexpected_tuple_length", str(len(result)))
-                # Just take the first two if that's what you need
-                columns = result[0] if len(result) > 0 else []
-                data = result[1] if len(result) > 1 else []
-                frappe.log_error("data_from_long_tuple", data)
-        elif isinstance(result, dict):
-            # If it returns a dictionary
-            columns = result.get('columns', [])
-            data = result.get('data', [])
-        else:
-            data = result
-            frappe.log_error("data_only", data)
-        
+    def on_submit(self):
+        super().on_submit()
 
-        # Check  overtime
-        total_ot_pay = 0
-        total_late_deduction = 0
-        total_overtime = 0
-        total_lateness = 0
-        default_shift = frappe.db.get_value("Employee", self.employee, "default_shift")
-        ot_sal_comp = frappe.db.get_value("Shift Type", default_shift, "custom_overtime_salary_component") or "Overtime"
-        late_sal_comp = frappe.db.get_value("Shift Type", default_shift, "custom_lateness_salary_component") or "Lateness"
-        if not ot_sal_comp or not late_sal_comp:
-            frappe.throw("Please set the Overtime salary component and Lateness salary component in the shift type")
-        for row in data:
-            if row.get("over_time") not in ("", None, "00:00:00"):
-                ot = self.parse_time_to_seconds(row.get("over_time"))
-                total_overtime += ot
-                if ot > 0:
-                    ot_pay = frappe.db.get_value("Shift Type", default_shift, "custom_overtime_pay")
-                    total_ot_pay = ot_pay * (ot/3600)
-            
-            if row.get("late_entry_hrs") not in ("", None, "00:00:00"):
-                lt = self.parse_time_to_seconds(row.get("late_entry_hrs"))
-                total_lateness += lt
-                if lt > 0:
-                    lt_ded = frappe.db.get_value("Shift Type", default_shift, "custom_lateness_fine")
-                    total_late_deduction = lt_ded * (lt/3600)
-        
-        # Check if Overtime already exists for this period
-        existing_overtime = frappe.db.exists("Additional Salary", {
-            "employee": self.employee,
-            "salary_component": ot_sal_comp,
-            "payroll_date": ["between", [self.start_date, self.end_date]],
-            "type": "Earning",
-            "docstatus": 1
-        })
-        
-        if not existing_overtime and total_ot_pay > 0:
-            add_sal_earning = frappe.get_doc({
-                "doctype": "Additional Salary",
-                "employee": self.employee,
-                "salary_component": ot_sal_comp,
-                "amount": total_ot_pay,
-                "payroll_date": self.end_date,
-                "company": self.company
-            })
-            add_sal_earning.insert()
-            add_sal_earning.save()
-            add_sal_earning.submit()
-            
-            # Manually add to earnings table
-            self.append("earnings", {
-                "salary_component": ot_sal_comp,
-                "amount": total_ot_pay,
-                "additional_salary": add_sal_earning.name
-            })
-            self.custom_total_overtime = frappe.utils.format_duration(total_overtime)
-        # Check if Lateness already exists for this period    
-        existing_lateness = frappe.db.exists("Additional Salary", {
-                "employee": self.employee,
-                "salary_component": late_sal_comp,
-                "payroll_date": ["between", [self.start_date, self.end_date]],
-                "type": "Deduction",
-                "docstatus": 1
-            })
-        
-        if not existing_lateness and total_late_deduction > 0:
-            add_sal_deduction = frappe.get_doc({
-                "doctype": "Additional Salary",
-                "employee": self.employee,
-                "salary_component": late_sal_comp,
-                "amount": total_late_deduction,
-                "payroll_date": self.end_date,
-                "company": self.company,
-                "type": "Deduction"
-            })
-            add_sal_deduction.insert()
-            add_sal_deduction.save()
-            add_sal_deduction.submit()
-            
-            # Manually add to deductions table
-            self.append("deductions", {
-                "salary_component": late_sal_comp,
-                "amount": total_late_deduction,
-                "additional_salary": add_sal_deduction.name
-            })
-            self.custom_total_lateness =  frappe.utils.format_duration(total_lateness)
+        # Additional Salary records are written in one batch after commit, see paye.payroll.additional_salary
+        from paye.payroll.additional_salary import queue_additional_salaries
+        queue_additional_salaries(self.name)
 
-    def parse_time_to_seconds(self, time_str):
+        # Submitting closes the period for the employee, its attendance totals are frozen
+        from paye.paye.doctype.attendance_period_snapshot.attendance_period_snapshot import (
+            queue_attendance_snapshots,
+        )
+        queue_attendance_snapshots(self.name)
+
+    def add_additional_salary_components(self, component_type):
+        super().add_additional_salary_components(component_type)
+        self.add_attendance_component(component_type)
+
+    def add_attendance_component(self, component_type):
         """
-        Parse various time formats to seconds
-        Supports: '1h 30m 55s', '01:30:55', '1:30:55', '90m', etc.
+        Add the period's overtime (earnings) or lateness (deductions) without writing an
+        Additional Salary, so validating a draft slip costs no writes
         """
-        if not time_str or time_str in ['00:00:00', '0', '']:
-            return 0
-        
-        time_str = str(time_str).strip()
-        
-        # Handle 'HH:MM:SS' format
-        if ':' in time_str:
-            parts = time_str.split(':')
-            if len(parts) == 3:
-                hours = int(parts[0])
-                minutes = int(parts[1])
-                seconds = int(parts[2])
-                return hours * 3600 + minutes * 60 + seconds
-            elif len(parts) == 2:
-                minutes = int(parts[0])
-                seconds = int(parts[1])
-                return minutes * 60 + seconds
-        
-        # Handle format like '1h 30m 55s'
-        total_seconds = 0
-        
-        # Extract hours
-        import re
-        hours_match = re.search(r'(\d+)h', time_str)
-        if hours_match:
-            total_seconds += int(hours_match.group(1)) * 3600
-        
-        # Extract minutes
-        minutes_match = re.search(r'(\d+)m', time_str)
-        if minutes_match:
-            total_seconds += int(minutes_match.group(1)) * 60
-        
-        # Extract seconds
-        seconds_match = re.search(r'(\d+)s', time_str)
-        if seconds_match:
-            total_seconds += int(seconds_match.group(1))
-        return total_seconds
\ No newline at end of file
+        totals = self.get_attendance_totals()
+        if component_type == "earnings":
+            component, amount = totals.overtime_component, totals.overtime_amount
+        else:
+            component, amount = totals.lateness_component, totals.lateness_amount
+
+        if amount <= 0:
+            return
+
+        # Already paid through a submitted Additional Salary for this period
+        if any(row.salary_component == component and row.additional_salary for row in self.get(component_type)):
+            return
+
+        self.update_component_row(get_salary_component_data(component), amount, component_type)
+
+    def get_payroll_context(self):
+        from paye.payroll.context import get_payroll_run_context
+
+        return get_payroll_run_context(self)
+
+    def get_attendance_totals(self):
+        return self.get_payroll_context().get_attendance_totals(self.employee)
+
+    def parse_time_to_seconds(self, time_str):
+        return parse_time_to_seconds(time_str)
+
+def parse_time_to_seconds(time_str):
+    """
+    Parse various time formats to seconds
+    Supports: '1d 2h 30m 55s', '01:30:55', '1:30:55', '90m', etc.
+    """
+    if not time_str or time_str in ['00:00:00', '0', '']:
+        return 0
+    
+    time_str = str(time_str).strip()
+    
+    # Handle 'HH:MM:SS' format
+    if ':' in time_str:
+        parts = time_str.split(':')
+        if len(parts) == 3:
+            hours = int(parts[0])
+            minutes = int(parts[1])
+            seconds = int(parts[2])
+            return hours * 3600 + minutes * 60 + seconds
+        elif len(parts) == 2:
+            minutes = int(parts[0])
+            seconds = int(parts[1])
+            return minutes * 60 + seconds
+    
+    # Handle format like '1d 2h 30m 55s'
+    total_seconds = 0
+    
+    # Extract days, format_duration starts counting in days from 24 hours
+    days_match = DAYS_PATTERN.search(time_str)
+    if days_match:
+        total_seconds += int(days_match.group(1)) * 86400
+    
+    # Extract hours
+    hours_match = HOURS_PATTERN.search(time_str)
+    if hours_match:
+        total_seconds += int(hours_match.group(1)) * 3600
+    
+    # Extract minutes
+    minutes_match = MINUTES_PATTERN.search(time_str)
+    if minutes_match:
+        total_seconds += int(minutes_match.group(1)) * 60
+    
+    # Extract seconds
+    seconds_match = SECONDS_PATTERN.search(time_str)
+    if seconds_match:
+        total_seconds += int(seconds_match.group(1))
+    return total_seconds
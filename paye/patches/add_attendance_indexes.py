@@ -0,0 +1,5 @@
+from paye.install import add_attendance_indexes
+
+
+def execute():
+    add_attendance_indexes()
@@ -0,0 +1,10 @@
+import frappe
+
+
+def execute():
+    # Backfill can take long on large sites, run it in a worker
+    frappe.enqueue(
+        "paye.paye.doctype.daily_attendance_summary.daily_attendance_summary.rebuild_daily_summary",
+        queue="long",
+        timeout=7200
+    )
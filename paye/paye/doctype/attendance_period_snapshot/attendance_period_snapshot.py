@@ -0,0 +1,262 @@
+# Copyright (c) 2026, Sawan Singh Parihar and contributors
+# For license information, please see license.txt
+
+import hashlib
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import flt, getdate, now_datetime
+
+DOCTYPE = "Attendance Period Snapshot"
+
+TOTALS_FIELDS = (
+    "overtime_seconds",
+    "lateness_seconds",
+    "overtime_amount",
+    "lateness_amount",
+    "overtime_component",
+    "lateness_component",
+)
+
+
+class AttendancePeriodSnapshot(Document):
+    def autoname(self):
+        self.name = get_snapshot_name(self.employee, self.start_date, self.end_date)
+
+
+def on_doctype_update():
+    frappe.db.add_index(DOCTYPE, ["employee", "start_date", "end_date"])
+
+
+def get_snapshot_name(employee, start_date, end_date):
+    return f"{employee}-{getdate(start_date)}-{getdate(end_date)}"
+
+
+def get_snapshot_totals(employees, start_date, end_date):
+    """Employee -> frozen attendance totals of the period, for employees with a snapshot"""
+    if not employees:
+        return {}
+
+    rows = frappe.get_all(
+        DOCTYPE,
+        filters={"employee": ["in", employees], "start_date": start_date, "end_date": end_date},
+        fields=["employee", *TOTALS_FIELDS]
+    )
+    return {row.pop("employee"): frappe._dict(row) for row in rows}
+
+
+def queue_attendance_snapshots(salary_slip):
+    """Snapshot the slips submitted in this request/job with one background job after commit"""
+    pending = getattr(frappe.local, "paye_pending_attendance_snapshots", None)
+    if pending is None:
+        pending = frappe.local.paye_pending_attendance_snapshots = []
+        frappe.db.after_commit.add(enqueue_pending_snapshots)
+        frappe.db.after_rollback.add(clear_pending_snapshots)
+
+    pending.append(salary_slip)
+
+
+def enqueue_pending_snapshots():
+    salary_slips = getattr(frappe.local, "paye_pending_attendance_snapshots", None)
+    frappe.local.paye_pending_attendance_snapshots = None
+    if not salary_slips:
+        return
+
+    frappe.enqueue(
+        "paye.paye.doctype.attendance_period_snapshot.attendance_period_snapshot.create_snapshots",
+        queue="long",
+        salary_slips=salary_slips
+    )
+
+
+def clear_pending_snapshots():
+    frappe.local.paye_pending_attendance_snapshots = None
+
+
+@frappe.whitelist()
+def close_attendance_period(payroll_entry):
+    """Freeze the attendance totals of every submitted slip of a Payroll Entry"""
+    frappe.get_doc("Payroll Entry", payroll_entry).check_permission("submit")
+
+    salary_slips = frappe.get_all(
+        "Salary Slip", filters={"payroll_entry": payroll_entry, "docstatus": 1}, pluck="name"
+    )
+    return create_snapshots(salary_slips)
+
+
+@frappe.whitelist()
+def reopen_attendance_period(payroll_entry):
+    """Drop the snapshots of a Payroll Entry so its slips recompute attendance again"""
+    frappe.get_doc("Payroll Entry", payroll_entry).check_permission("cancel")
+    frappe.db.delete(DOCTYPE, {"payroll_entry": payroll_entry})
+
+
+def create_snapshots(salary_slips):
+    """
+    Snapshot what submitted salary slips paid for attendance, with one insert per period.
+    A snapshot lives as long as its slip is submitted (written after submit, deleted on
+    cancel): later slips of the employee's period reuse the paid totals instead of
+    recomputing them from attendance edited since, see verify_attendance_snapshots.
+    Seconds are the payroll run context's integer totals, amounts and components those of
+    the slip's overtime and lateness rows. Employees that already have a snapshot for the
+    period keep it. Returns the number created.
+    """
+    from paye.payroll.attendance import get_period_shifts
+    from paye.payroll.context import get_payroll_run_context
+
+    if not salary_slips:
+        return 0
+
+    slips = frappe.get_all(
+        "Salary Slip",
+        filters={"name": ["in", salary_slips], "docstatus": 1},
+        fields=[
+            "name", "employee", "employee_name", "company", "payroll_entry", "start_date", "end_date"
+        ]
+    )
+    if not slips:
+        return 0
+
+    paid = get_paid_attendance_totals(slips)
+
+    periods = {}
+    for slip in slips:
+        periods.setdefault((slip.start_date, slip.end_date), []).append(slip)
+
+    created = 0
+    now = now_datetime()
+    for (start_date, end_date), period_slips in periods.items():
+        employees = [slip.employee for slip in period_slips]
+        existing = get_snapshot_totals(employees, start_date, end_date)
+        period_slips = [slip for slip in period_slips if slip.employee not in existing]
+        if not period_slips:
+            continue
+
+        employees = [slip.employee for slip in period_slips]
+        shifts = get_period_shifts(employees, start_date, end_date)
+        checksums = get_source_checksums(employees, start_date, end_date)
+
+        values = []
+        for slip in period_slips:
+            if slip.employee in existing:
+                continue
+            existing[slip.employee] = totals = paid[slip.name]
+            # The seconds the slip was computed with, see SalarySlip.get_attendance_totals
+            run_totals = get_payroll_run_context(slip).get_attendance_totals(slip.employee)
+            totals.overtime_seconds = run_totals.overtime_seconds
+            totals.lateness_seconds = run_totals.lateness_seconds
+            checksum, days = checksums.get(slip.employee, (None, 0))
+            values.append((
+                get_snapshot_name(slip.employee, start_date, end_date), now, now,
+                frappe.session.user, frappe.session.user,
+                slip.employee, slip.employee_name, slip.company, shifts.get(slip.employee), start_date, end_date,
+                slip.name, slip.payroll_entry, *(totals[fieldname] for fieldname in TOTALS_FIELDS),
+                days, checksum
+            ))
+
+        frappe.db.bulk_insert(
+            DOCTYPE,
+            fields=[
+                "name", "creation", "modified", "owner", "modified_by",
+                "employee", "employee_name", "company", "shift", "start_date", "end_date",
+                "salary_slip", "payroll_entry", *TOTALS_FIELDS, "source_days", "source_checksum"
+            ],
+            values=values,
+            ignore_duplicates=True
+        )
+        created += len(values)
+
+    return created
+
+
+def get_paid_attendance_totals(slips):
+    """Salary Slip -> overtime/lateness amounts and components as stored on the slip"""
+    from paye.attendance.shift_rules import load_shift_rules
+    from paye.payroll.attendance import new_totals
+
+    # Components any shift pays overtime and lateness with, see attendance.apply_shift_rates
+    shift_rules = load_shift_rules().values()
+    components = {
+        "earnings": {"Overtime", *(rule.overtime_salary_component for rule in shift_rules)},
+        "deductions": {"Lateness", *(rule.lateness_salary_component for rule in shift_rules)},
+    }
+
+    rows = frappe.db.sql("""
+        SELECT parent, parentfield, salary_component, SUM(amount) AS amount
+        FROM `tabSalary Detail`
+        WHERE parenttype = 'Salary Slip'
+            AND parent IN %(salary_slips)s
+            AND parentfield IN ('earnings', 'deductions')
+        GROUP BY parent, parentfield, salary_component
+    """, {"salary_slips": [slip.name for slip in slips]}, as_dict=1)
+
+    totals = {slip.name: new_totals() for slip in slips}
+
+    for row in rows:
+        if row.salary_component not in components[row.parentfield]:
+            continue
+        slip_totals = totals[row.parent]
+        if row.parentfield == "earnings":
+            slip_totals.overtime_component = row.salary_component
+            slip_totals.overtime_amount += flt(row.amount)
+        else:
+            slip_totals.lateness_component = row.salary_component
+            slip_totals.lateness_amount += flt(row.amount)
+
+    return totals
+
+
+def delete_snapshot(doc, method=None):
+    """Salary Slip on_cancel: the period is open again for the employee"""
+    frappe.db.delete(DOCTYPE, {"salary_slip": doc.name})
+
+
+def get_source_checksums(employees, start_date, end_date):
+    """Employee -> (SHA-256 of the period's Daily Attendance Summary rows, number of days)"""
+    rows = frappe.db.sql("""
+        SELECT employee, attendance_date, shift, over_time_seconds, late_entry_seconds
+        FROM `tabDaily Attendance Summary`
+        WHERE employee IN %(employees)s
+            AND attendance_date BETWEEN %(from_date)s AND %(to_date)s
+        ORDER BY employee, attendance_date
+    """, {"employees": employees, "from_date": start_date, "to_date": end_date})
+
+    hashes = {}
+    days = {}
+    for employee, *values in rows:
+        if employee not in hashes:
+            hashes[employee] = hashlib.sha256()
+            days[employee] = 0
+        hashes[employee].update("|".join(str(value) for value in values).encode() + b"\n")
+        days[employee] += 1
+
+    return {employee: (digest.hexdigest(), days[employee]) for employee, digest in hashes.items()}
+
+
+@frappe.whitelist()
+def verify_attendance_snapshots(payroll_entry):
+    """Snapshots of a Payroll Entry whose source attendance changed after the period was closed"""
+    frappe.has_permission("Payroll Entry", "read", payroll_entry, throw=True)
+
+    snapshots = frappe.get_all(
+        DOCTYPE,
+        filters={"payroll_entry": payroll_entry},
+        fields=["name", "employee", "start_date", "end_date", "source_checksum"]
+    )
+    if not snapshots:
+        frappe.throw(_("No attendance snapshots found for {0}").format(payroll_entry))
+
+    changed = []
+    periods = {}
+    for snapshot in snapshots:
+        periods.setdefault((snapshot.start_date, snapshot.end_date), []).append(snapshot)
+
+    for (start_date, end_date), period_snapshots in periods.items():
+        checksums = get_source_checksums([snapshot.employee for snapshot in period_snapshots], start_date, end_date)
+        for snapshot in period_snapshots:
+            checksum = checksums.get(snapshot.employee, (None, 0))[0]
+            if checksum != snapshot.source_checksum:
+                changed.append({"snapshot": snapshot.name, "employee": snapshot.employee})
+
+    return changed
@@ -0,0 +1,337 @@
+# Copyright (c) 2026, Sawan Singh Parihar and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import add_days, add_months, cint, getdate, now_datetime
+
+from paye.attendance.cache import invalidate
+from paye.attendance.records import compute_record
+from paye.attendance.shift_rules import load_shift_rules
+
+DOCTYPE = "Daily Attendance Summary"
+
+SUMMARY_FIELDS = (
+    "employee",
+    "employee_name",
+    "attendance_date",
+    "shift",
+    "first_checkin",
+    "last_checkin",
+    "checkin_count",
+    "working_seconds",
+    "late_entry_seconds",
+    "early_exit_seconds",
+    "over_time_seconds",
+    "actual_over_time_seconds",
+)
+
+NUMERIC_FIELDS = {fieldname for fieldname in SUMMARY_FIELDS if fieldname.endswith(("_seconds", "_count"))}
+
+
+class DailyAttendanceSummary(Document):
+    def autoname(self):
+        self.name = get_summary_name(self.employee, self.attendance_date)
+
+
+def on_doctype_update():
+    frappe.db.add_index(DOCTYPE, ["employee", "attendance_date"])
+    frappe.db.add_index(DOCTYPE, ["is_dirty", "attendance_date"])
+
+
+def get_summary_name(employee, attendance_date):
+    return f"{employee}-{getdate(attendance_date)}"
+
+
+def update_for_checkin(doc, method=None):
+    """Employee Checkin on_update (also runs on insert): mark the affected employee-days dirty"""
+    days = {(doc.employee, getdate(doc.time))}
+
+    previous = doc.get_doc_before_save()
+    if previous and previous.employee and previous.time:
+        days.add((previous.employee, getdate(previous.time)))
+
+    mark_dirty(days)
+
+
+def remove_for_checkin(doc, method=None):
+    """Employee Checkin after_delete: the day is recomputed from the remaining checkins"""
+    mark_dirty([(doc.employee, getdate(doc.time))])
+
+
+def update_for_shift_type(doc, method=None):
+    """Shift Type on_update: stored seconds depend on the shift timings and grace periods"""
+    if not doc.has_value_changed("start_time") and not doc.has_value_changed("end_time") \
+            and not doc.has_value_changed("late_entry_grace_period") \
+            and not doc.has_value_changed("early_exit_grace_period"):
+        return
+
+    frappe.enqueue(
+        "paye.paye.doctype.daily_attendance_summary.daily_attendance_summary.rebuild_for_shift",
+        queue="long",
+        shift=doc.name,
+        enqueue_after_commit=True
+    )
+
+
+def rebuild_for_shift(shift):
+    bounds = frappe.db.sql("""
+        SELECT MIN(attendance_date), MAX(attendance_date)
+        FROM `tabDaily Attendance Summary`
+        WHERE shift = %s
+    """, shift)
+    if not bounds or not bounds[0][0]:
+        return
+
+    employees = frappe.get_all(DOCTYPE, filters={"shift": shift}, pluck="employee", distinct=True)
+    rebuild_daily_summary(bounds[0][0], bounds[0][1], employees=employees)
+
+    # Entries cached while the rebuild was queued hold the old seconds
+    invalidate()
+
+
+# Incremental recompute
+# ---------------------
+# Checkin changes only flag their employee-days (is_dirty, in the same transaction as the
+# checkin). A background job recomputes the flagged days with the report's Python rules,
+# so the cost grows with the number of edits rather than the length of the period.
+# Readers never write: they skip stored days still flagged dirty and compute those, and
+# the days with checkins but no row yet, from the checkins on the fly (get_dirty_days,
+# get_unsummarized_days, compute_days), so they never see a stale or missing day.
+
+DIRTY_BATCH_SIZE = 5000
+
+
+def mark_dirty(days):
+    """Flag (employee, attendance date) pairs for recompute; days without a row get a placeholder"""
+    days = list(days)
+    if not days:
+        return
+
+    now = now_datetime()
+    values = []
+    for employee, attendance_date in days:
+        values.extend((get_summary_name(employee, attendance_date), now, now, frappe.session.user,
+            frappe.session.user, employee, attendance_date))
+
+    frappe.db.sql("""
+        INSERT INTO `tabDaily Attendance Summary`
+            (name, creation, modified, owner, modified_by, employee, attendance_date, is_dirty)
+        VALUES {placeholders}
+        ON DUPLICATE KEY UPDATE is_dirty = 1
+    """.format(placeholders=", ".join(["(%s, %s, %s, %s, %s, %s, %s, 1)"] * len(days))), values)
+
+    frappe.enqueue(
+        "paye.paye.doctype.daily_attendance_summary.daily_attendance_summary.process_dirty_days",
+        queue="short",
+        job_id="paye_dirty_attendance_days",
+        deduplicate=True,
+        enqueue_after_commit=True
+    )
+
+
+def process_dirty_days(from_date=None, to_date=None, employees=None, limit=DIRTY_BATCH_SIZE, commit=True):
+    """
+    Recompute dirty employee-days, optionally only those of a range/employees. Also run by
+    the scheduler in case a job was lost. Returns the number of days recomputed.
+    """
+    conditions = ""
+    if from_date and to_date:
+        conditions += " AND attendance_date BETWEEN %(from_date)s AND %(to_date)s"
+    if employees:
+        conditions += " AND employee IN %(employees)s"
+
+    # Locked until commit: a checkin edit meanwhile waits and flags the day again afterwards
+    days = frappe.db.sql(f"""
+        SELECT employee, attendance_date
+        FROM `tabDaily Attendance Summary`
+        WHERE is_dirty = 1 {conditions}
+        ORDER BY attendance_date, employee
+        LIMIT {cint(limit)}
+        FOR UPDATE
+    """, {"from_date": from_date, "to_date": to_date, "employees": employees})
+    if not days:
+        return 0
+
+    employees_by_date = {}
+    for employee, attendance_date in days:
+        employees_by_date.setdefault(getdate(attendance_date), []).append(employee)
+
+    for attendance_date, date_employees in employees_by_date.items():
+        recompute_days(attendance_date, date_employees)
+
+    if commit:
+        frappe.db.commit()
+    return len(days)
+
+
+def recompute_days(attendance_date, employees):
+    """Rebuild the summary of some employees on one date with the Python engine's rules"""
+    rows = compute_days({(employee, attendance_date) for employee in employees})
+
+    frappe.db.delete(DOCTYPE, {"attendance_date": attendance_date, "employee": ["in", employees]})
+
+    now = now_datetime()
+    values = []
+    for row in rows:
+        values.append((
+            get_summary_name(row.employee, attendance_date),
+            now,
+            now,
+            frappe.session.user,
+            frappe.session.user,
+            *get_summary_values(row),
+        ))
+
+    if values:
+        frappe.db.bulk_insert(
+            DOCTYPE,
+            fields=["name", "creation", "modified", "owner", "modified_by", *SUMMARY_FIELDS],
+            values=values
+        )
+
+
+def compute_days(days):
+    """
+    Summary rows of (employee, attendance date) pairs computed from their checkins with the
+    Python engine's rules, without writing them. Days without checkins have no row.
+    """
+    from paye.paye.report.custom_shift_attendance.custom_shift_attendance import get_payroll_query
+
+    if not days:
+        return []
+
+    dates = [attendance_date for employee, attendance_date in days]
+    filters = {
+        "from_date": min(dates),
+        "to_date": max(dates),
+        "employees": list({employee for employee, attendance_date in days}),
+    }
+    rows = [
+        row for row in frappe.db.sql(get_payroll_query(filters), filters, as_dict=1)
+        # The checkin window runs into the next day
+        if (row.employee, getdate(row.attendance_date)) in days
+    ]
+    shift_rules = load_shift_rules(row.shift_type for row in rows)
+
+    for row in rows:
+        row.update(compute_record(row, shift_rules.get(row.shift_type))._asdict())
+
+    return rows
+
+
+def get_dirty_days(from_date, to_date, employees=None):
+    """(employee, attendance date) pairs of the range still waiting for process_dirty_days"""
+    conditions = " AND employee IN %(employees)s" if employees else ""
+
+    return {
+        (employee, getdate(attendance_date))
+        for employee, attendance_date in frappe.db.sql(f"""
+            SELECT employee, attendance_date
+            FROM `tabDaily Attendance Summary`
+            WHERE is_dirty = 1 AND attendance_date BETWEEN %(from_date)s AND %(to_date)s {conditions}
+        """, {"from_date": from_date, "to_date": to_date, "employees": employees})
+    }
+
+
+def get_unsummarized_days(from_date, to_date, employees=None):
+    """(employee, attendance date) pairs of the range with checkins but no summary row, e.g. before the backfill ran"""
+    return {
+        (employee, getdate(attendance_date))
+        for employee, attendance_date in frappe.db.sql(get_unsummarized_days_query(employees),
+            {"from_date": from_date, "to_date": to_date, "employees": employees})
+    }
+
+
+def get_unsummarized_days_query(employees=None):
+    return """
+        SELECT DISTINCT
+            ci.employee,
+            DATE(ci.time) AS attendance_date
+        FROM
+            `tabEmployee Checkin` ci
+        WHERE
+            ci.time >= %(from_date)s
+            AND ci.time < %(to_date)s + INTERVAL 1 DAY
+            AND ci.skip_auto_attendance = 0
+            {conditions}
+            AND NOT EXISTS (
+                SELECT 1
+                FROM `tabDaily Attendance Summary` s
+                WHERE s.employee = ci.employee
+                    AND s.attendance_date = DATE(ci.time)
+            )
+    """.format(conditions="AND ci.employee IN %(employees)s" if employees else "")
+
+
+def refresh_daily_summary(employee, attendance_date):
+    """Recompute a single employee-day from its checkins"""
+    rebuild_daily_summary(attendance_date, attendance_date, employees=[employee])
+
+
+def rebuild_daily_summary(from_date=None, to_date=None, employees=None):
+    """
+    Recompute the summary for a date range (all checkins if not given), one month at a time.
+    Existing rows of the range are replaced.
+    """
+    if not from_date or not to_date:
+        bounds = frappe.db.sql("SELECT MIN(DATE(time)), MAX(DATE(time)) FROM `tabEmployee Checkin`")
+        if not bounds or not bounds[0][0]:
+            return
+        from_date = from_date or bounds[0][0]
+        to_date = to_date or bounds[0][1]
+
+    chunk_start = getdate(from_date)
+    to_date = getdate(to_date)
+    while chunk_start <= to_date:
+        chunk_end = min(add_days(add_months(chunk_start, 1), -1), to_date)
+        _rebuild_range(chunk_start, chunk_end, employees)
+        chunk_start = add_days(chunk_end, 1)
+
+
+def _rebuild_range(from_date, to_date, employees=None):
+    from paye.paye.report.custom_shift_attendance.custom_shift_attendance import (
+        SQL_ENGINE_COLUMNS,
+        get_payroll_query,
+    )
+
+    filters = {"from_date": from_date, "to_date": to_date, "consider_grace": 1}
+    if employees:
+        filters["employees"] = employees
+
+    rows = frappe.db.sql(get_payroll_query(filters, computed_columns=SQL_ENGINE_COLUMNS), filters, as_dict=1)
+
+    delete_filters = {"attendance_date": ["between", [from_date, to_date]]}
+    if employees:
+        delete_filters["employee"] = ["in", employees]
+    frappe.db.delete(DOCTYPE, delete_filters)
+
+    now = now_datetime()
+    values = []
+    for row in rows:
+        # The checkin window runs into the next day, keep only days of this range
+        if not (from_date <= getdate(row.attendance_date) <= to_date):
+            continue
+        values.append((
+            get_summary_name(row.employee, row.attendance_date),
+            now,
+            now,
+            frappe.session.user,
+            frappe.session.user,
+            *get_summary_values(row),
+        ))
+
+    if values:
+        frappe.db.bulk_insert(
+            DOCTYPE,
+            fields=["name", "creation", "modified", "owner", "modified_by", *SUMMARY_FIELDS],
+            values=values
+        )
+
+
+def get_summary_values(row):
+    """Values of SUMMARY_FIELDS for a row computed by the SQL engine"""
+    return [
+        row.get(fieldname) or 0 if fieldname in NUMERIC_FIELDS else row.get(fieldname)
+        for fieldname in SUMMARY_FIELDS
+    ]
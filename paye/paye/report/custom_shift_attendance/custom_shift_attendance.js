@@ -1,3 +1,6 @@
+// Rows per request when loading while scrolling, same as LAZY_PAGE_SIZE on the server
+const PAYE_ATTENDANCE_PAGE_SIZE = 500;
+
 frappe.query_reports["Custom Shift Attendance"] = {
     filters: [
         {
@@ -55,10 +58,121 @@ frappe.query_reports["Custom Shift Attendance"] = {
             label: __("Consider Grace Period"),
             fieldtype: "Check",
             default: 1
+        },
+        {
+            fieldname: "engine",
+            label: __("Calculation Engine"),
+            fieldtype: "Select",
+            options: "Daily Summary\nPython\nSQL\nShift Window",
+            default: "Daily Summary"
+        },
+        {
+            fieldname: "group_by",
+            label: __("Group By"),
+            fieldtype: "Select",
+            options: "\nEmployee\nDepartment\nShift"
+        },
+        {
+            fieldname: "lazy_load",
+            label: __("Load Rows While Scrolling"),
+            fieldtype: "Check",
+            default: 0,
+            description: __("Print and the total row only cover the rows loaded so far, Export includes every row")
         }
     ],
 
+    onload: function (report) {
+        report.page.add_inner_button(__("Export Large Range"), function () {
+            frappe.prompt(
+                {
+                    fieldname: "file_format",
+                    label: __("Format"),
+                    fieldtype: "Select",
+                    options: "CSV\nExcel\nParquet",
+                    default: "CSV"
+                },
+                (values) => {
+                    frappe.call({
+                        method: "paye.attendance.export.export_attendance_dataset",
+                        args: {
+                            filters: report.get_filter_values(),
+                            file_format: values.file_format
+                        }
+                    });
+                },
+                __("Export Custom Shift Attendance")
+            );
+        });
+
+        // Drill down from a group total to its per-day rows
+        report.page.wrapper.on("click", ".paye-attendance-drill-down", function () {
+            const filters = { group_by: "" };
+            filters[$(this).attr("data-fieldname")] = decodeURIComponent($(this).attr("data-value"));
+            report.set_filter_value(filters);
+        });
+
+        frappe.realtime.off("paye_attendance_export_ready");
+        frappe.realtime.on("paye_attendance_export_ready", (data) => {
+            frappe.msgprint(
+                __("Your export is ready: {0}", [`<a href="${data.file_url}">${__("Download")}</a>`])
+            );
+        });
+    },
+
+    after_datatable_render: function (datatable) {
+        const report = frappe.query_report;
+        const scroller = datatable.bodyScrollable;
+        $(scroller).off("scroll.paye_attendance");
+
+        if (
+            !report.get_filter_value("lazy_load") ||
+            report.get_filter_value("group_by") ||
+            report.data.length < PAYE_ATTENDANCE_PAGE_SIZE
+        ) {
+            return;
+        }
+
+        // Rows are ordered by employee and attendance date, the last row is the key of the next page
+        let loading = false;
+        let done = false;
+        $(scroller).on("scroll.paye_attendance", () => {
+            if (loading || done || scroller.scrollTop + scroller.clientHeight < scroller.scrollHeight - 200) {
+                return;
+            }
+
+            const last = report.data[report.data.length - 1];
+            loading = true;
+            frappe
+                .call({
+                    method: "paye.paye.report.custom_shift_attendance.custom_shift_attendance.get_page",
+                    args: {
+                        filters: report.get_filter_values(),
+                        after_employee: last.employee,
+                        after_date: last.attendance_date,
+                        page_size: PAYE_ATTENDANCE_PAGE_SIZE
+                    }
+                })
+                .then((r) => {
+                    const rows = r.message.rows;
+                    report.data.push(...rows);
+                    datatable.appendRows(rows);
+                    done = !r.message.next;
+                })
+                .always(() => {
+                    loading = false;
+                });
+        });
+    },
+
     formatter: function (value, row, column, data, default_formatter) {
+        const group_by = frappe.query_report.get_filter_value("group_by");
+        if (group_by && data && data[column.fieldname] && column.fieldname === group_by.toLowerCase()) {
+            return `<a class="paye-attendance-drill-down" data-fieldname="${column.fieldname}"
+                data-value="${encodeURIComponent(data[column.fieldname])}">${frappe.utils.escape_html(
+                data[column.fieldname]
+            )}</a>`;
+        }
+
         value = default_formatter(value, row, column, data);
 
         if (
@@ -1,17 +1,115 @@
+from datetime import datetime, timedelta
+from itertools import islice
+
 import frappe
 from frappe import _
-from frappe.utils import getdate, add_days, get_time, format_duration, flt
-from datetime import datetime, timedelta
+from frappe.utils import add_days, cint, flt, format_duration, get_time, getdate
+
+from paye.attendance.cache import cache_report, get_cached_report
+from paye.attendance.records import compute_record, record_from_row
+from paye.attendance.shift_assignments import load_shift_index
+from paye.attendance.shift_rules import load_shift_rules
+from paye.attendance.shift_windows import compute_window_record, get_scan_bounds, iter_shift_days
+from paye.instrumentation import instrument
+
+# Report column -> AttendanceRecord seconds field
+RENDERED_SECONDS = (
+    ('late_entry_hrs', 'late_entry_seconds'),
+    ('early_exit_hrs', 'early_exit_seconds'),
+    ('over_time', 'over_time_seconds'),
+    ('actual_over_time', 'actual_over_time_seconds'),
+)
+
+# Seconds since midnight / working seconds of a grouped employee-day
+IN_SECONDS = "TIME_TO_SEC(TIME(MIN(ci.time)))"
+OUT_SECONDS = "TIME_TO_SEC(TIME(MAX(ci.time)))"
+SHIFT_START_SECONDS = "COALESCE(TIME_TO_SEC(st.start_time), 0)"
+SHIFT_END_SECONDS = "COALESCE(TIME_TO_SEC(st.end_time), 0)"
+WORKING_SECONDS = "TIMESTAMPDIFF(SECOND, MIN(ci.time), MAX(ci.time))"
+HAS_SHIFT_TIMINGS = f"({WORKING_SECONDS} > 0 AND {SHIFT_START_SECONDS} > 0 AND {SHIFT_END_SECONDS} > 0)"
+
+# Mirrors records.compute_record; NULL means the Python engine leaves the value unset
+SQL_ENGINE_COLUMNS = f"""
+            , CASE
+                WHEN NOT {HAS_SHIFT_TIMINGS} THEN 0
+                WHEN {IN_SECONDS} = 0 THEN NULL
+                WHEN {IN_SECONDS} > {SHIFT_START_SECONDS}
+                    + COALESCE(st.late_entry_grace_period, 0) * 60 * %(consider_grace)s
+                    THEN GREATEST({IN_SECONDS} - {SHIFT_START_SECONDS}, 0)
+                ELSE 0
+            END AS late_entry_seconds
+            , CASE
+                WHEN NOT {HAS_SHIFT_TIMINGS} THEN 0
+                WHEN {OUT_SECONDS} = 0 THEN NULL
+                WHEN {OUT_SECONDS} < {SHIFT_END_SECONDS}
+                    - COALESCE(st.early_exit_grace_period, 0) * 60 * %(consider_grace)s
+                    THEN GREATEST({SHIFT_END_SECONDS} - {OUT_SECONDS}, 0)
+                ELSE 0
+            END AS early_exit_seconds
+            , CASE
+                WHEN NOT {HAS_SHIFT_TIMINGS} THEN 0
+                WHEN {OUT_SECONDS} = 0 THEN NULL
+                WHEN {OUT_SECONDS} > {SHIFT_END_SECONDS} THEN {OUT_SECONDS} - {SHIFT_END_SECONDS}
+                ELSE 0
+            END AS over_time_seconds
+            , CASE
+                WHEN NOT {HAS_SHIFT_TIMINGS} THEN 0
+                WHEN {WORKING_SECONDS} > {SHIFT_END_SECONDS} - {SHIFT_START_SECONDS}
+                    THEN {WORKING_SECONDS} - ({SHIFT_END_SECONDS} - {SHIFT_START_SECONDS})
+                ELSE 0
+            END AS actual_over_time_seconds
+"""
 
+# Shift columns of a grouped employee-day for HAVING, which can only reference grouped,
+# selected or aggregated columns. A day's checkins share one shift, so MAX is that shift
+GROUPED_SHIFT_START_SECONDS = "COALESCE(TIME_TO_SEC(MAX(st.start_time)), 0)"
+GROUPED_SHIFT_END_SECONDS = "COALESCE(TIME_TO_SEC(MAX(st.end_time)), 0)"
+GROUPED_HAS_SHIFT_TIMINGS = (
+    f"({WORKING_SECONDS} > 0 AND {GROUPED_SHIFT_START_SECONDS} > 0 AND {GROUPED_SHIFT_END_SECONDS} > 0)"
+)
+
+# Filters on the grouped employee-day, evaluated in HAVING (see plan_filters). Exact
+# equivalents of late_entry_seconds / early_exit_seconds > 0 in records.compute_record
+AGGREGATE_FILTERS = (
+    ('late_entry', f"""
+        {GROUPED_HAS_SHIFT_TIMINGS} AND {IN_SECONDS} > {GROUPED_SHIFT_START_SECONDS}
+            + COALESCE(MAX(st.late_entry_grace_period), 0) * 60 * %(consider_grace)s
+    """),
+    ('early_exit', f"""
+        {GROUPED_HAS_SHIFT_TIMINGS} AND {OUT_SECONDS} > 0 AND {OUT_SECONDS} < {GROUPED_SHIFT_END_SECONDS}
+            - COALESCE(MAX(st.early_exit_grace_period), 0) * 60 * %(consider_grace)s
+    """),
+)
+
+@instrument('attendance_report.execute')
 def execute(filters=None):
     if not filters:
         filters = {}
-    
-    columns = get_columns()
-    data = get_data(filters)
-    
+
+    columns = get_group_columns(filters['group_by']) if filters.get('group_by') else get_columns()
+
+    # With lazy loading only the view gets the first page and requests the rest with get_page.
+    # Export and other callers of execute always get every row
+    first_page_only = bool(filters.get('lazy_load')) and not filters.get('group_by') and is_report_view()
+
+    # Reopening the report with the same filters is served from the attendance cache
+    cache_filters = dict(filters, engine=get_engine(filters), lazy_load=1 if first_page_only else 0)
+    data = get_cached_report(cache_filters)
+    if data is None:
+        if filters.get('group_by'):
+            data = get_grouped_data(filters)
+        elif first_page_only:
+            data = get_page_data(filters, page_size=LAZY_PAGE_SIZE)
+        else:
+            data = get_data(filters)
+        cache_report(cache_filters, data)
+
     return columns, data
 
+def is_report_view():
+    """The report view loads its data with query_report.run, Export goes through export_query"""
+    return frappe.form_dict.get('cmd') == 'frappe.desk.query_report.run'
+
 def get_columns():
     return [
         {
@@ -135,12 +233,225 @@ def get_columns():
         }
     ]
 
+@instrument('attendance_report.get_data')
 def get_data(filters):
-    conditions = get_conditions(filters)
-    
+    engine = get_engine(filters)
+    if engine == 'Shift Window':
+        return list(iter_shift_window_rows(filters))
+
+    result = get_engine_rows(filters, engine)
+
+    return process_rows(result, filters, engine)
+
+def get_engine(filters):
+    engine = filters.get('engine') or 'Python'
+
+    # The summary is stored with grace periods applied
+    if engine == 'Daily Summary' and not filters.get('consider_grace_period', 1):
+        return 'SQL'
+
+    return engine
+
+def get_engine_rows(filters, engine, order_by=None, limit=None):
+    if engine == 'Daily Summary':
+        return get_summary_rows(filters, order_by=order_by, limit=limit)
+
+    return frappe.db.sql(get_engine_query(filters, engine, order_by=order_by, limit=limit),
+        get_query_values(filters), as_dict=1)
+
+def get_summary_rows(filters, order_by=None, limit=None):
+    """Stored days merged with the pending days of the range, in the order of the summary query"""
+    rows = frappe.db.sql(get_summary_query(filters, order_by=order_by, limit=limit),
+        get_query_values(filters), as_dict=1)
+
+    pending_rows = get_pending_rows(filters)
+    if not pending_rows:
+        return rows
+
+    rows.extend(pending_rows)
+    if order_by:
+        # Keyset order, see KEYSET_ORDER
+        rows.sort(key=lambda row: (row.employee, getdate(row.attendance_date)))
+    else:
+        rows.sort(key=lambda row: row.employee_name or '')
+        rows.sort(key=lambda row: getdate(row.attendance_date), reverse=True)
+
+    return rows[:cint(limit)] if limit else rows
+
+def get_pending_rows(filters):
+    """
+    Summary rows of the days still flagged dirty or not summarized yet (e.g. before the
+    backfill ran), computed from their checkins with the Python engine's rules. Reads never
+    write, the background job stores them (see daily_attendance_summary.process_dirty_days)
+    """
+    from paye.paye.doctype.daily_attendance_summary.daily_attendance_summary import (
+        get_dirty_days,
+        get_unsummarized_days,
+    )
+
+    employees = filters.get('employees') or ([filters['employee']] if filters.get('employee') else None)
+    pending_days = get_dirty_days(filters.get('from_date'), filters.get('to_date'), employees)
+    pending_days |= get_unsummarized_days(filters.get('from_date'), filters.get('to_date'), employees)
+
+    # Keyset pagination: days of earlier pages were already returned, see iter_data
+    if filters.get('after_employee'):
+        after = (filters['after_employee'], getdate(filters.get('after_date')))
+        pending_days = {day for day in pending_days if day > after}
+
+    if not pending_days:
+        return []
+
+    # The checkin query of the pending employees and dates, with the report's own filters
+    dates = [attendance_date for employee, attendance_date in pending_days]
+    pending_filters = frappe._dict(filters, from_date=min(dates), to_date=max(dates), after_employee=None,
+        employees=sorted({employee for employee, attendance_date in pending_days}))
+    rows = [
+        row for row in frappe.db.sql(get_query(pending_filters), get_query_values(pending_filters), as_dict=1)
+        if (row.employee, getdate(row.attendance_date)) in pending_days
+    ]
+
+    # The summary is stored with grace periods applied
+    shift_rules = load_shift_rules(row.shift_type for row in rows)
+    for row in rows:
+        record = compute_record(row, shift_rules.get(row.shift_type))
+        for seconds_field in ('late_entry_seconds', 'early_exit_seconds', 'over_time_seconds',
+                'actual_over_time_seconds'):
+            row[seconds_field] = getattr(record, seconds_field)
+
+    return rows
+
+def get_engine_query(filters, engine, order_by=None, limit=None):
+    if engine == 'Daily Summary':
+        return get_summary_query(filters, order_by=order_by, limit=limit)
+
+    # The SQL engine computes late entry, early exit and overtime seconds in the query
+    if engine == 'SQL':
+        return get_query(filters, computed_columns=SQL_ENGINE_COLUMNS, order_by=order_by, limit=limit)
+
+    return get_query(filters, order_by=order_by, limit=limit)
+
+def get_query_values(filters):
+    values = dict(filters)
+    values['consider_grace'] = 1 if filters.get('consider_grace_period', 1) else 0
+    return values
+
+@instrument('attendance_report.process_rows')
+def process_rows(result, filters, engine, shift_rules=None):
+    if engine == 'Python':
+        # Load every referenced Shift Type once instead of once per row
+        if shift_rules is None:
+            shift_rules = load_shift_rules(row.shift_type for row in result)
+
+        for row in result:
+            process_row_data(row, filters, shift_rules)
+    else:
+        # Seconds were computed by the database, only format them
+        for row in result:
+            format_row_data(row)
+
+    return result
+
+def get_attendance_records(filters):
+    """Unformatted AttendanceRecords for internal callers, e.g. payroll"""
+    engine = get_engine(filters)
+    if engine == 'Shift Window':
+        return [record for record, row in iter_shift_window_records(filters)]
+
+    result = get_engine_rows(filters, engine)
+
+    if engine != 'Python':
+        return [record_from_row(row) for row in result]
+
+    shift_rules = load_shift_rules(row.shift_type for row in result)
+    consider_grace = filters.get('consider_grace_period', 1)
+    return [compute_record(row, shift_rules.get(row.shift_type), consider_grace) for row in result]
+
+def get_summary_query(filters, order_by=None, limit=None):
+    """Read precomputed employee-days from Daily Attendance Summary"""
+    return """
+        SELECT
+            emp.name AS employee,
+            emp.employee_name,
+            emp.department,
+            emp.company,
+            s.attendance_date,
+            s.shift,
+            att.name AS attendance_id,
+            att.status AS attendance_status,
+            s.first_checkin,
+            s.last_checkin,
+            s.checkin_count,
+            TIME(s.first_checkin) AS in_time,
+            TIME(s.last_checkin) AS out_time,
+            s.working_seconds,
+            st.start_time AS shift_start_time,
+            st.end_time AS shift_end_time,
+            st.name AS shift_type,
+            s.late_entry_seconds,
+            s.early_exit_seconds,
+            s.over_time_seconds,
+            s.actual_over_time_seconds
+        FROM
+            `tabDaily Attendance Summary` s
+        INNER JOIN
+            `tabEmployee` emp ON s.employee = emp.name
+        LEFT JOIN
+            `tabAttendance` att ON att.employee = s.employee
+                AND att.attendance_date = s.attendance_date
+        LEFT JOIN
+            `tabShift Type` st ON st.name = s.shift
+        WHERE
+            s.attendance_date BETWEEN %(from_date)s AND %(to_date)s
+            {conditions}
+        ORDER BY
+            {order_by}
+        {limit}
+    """.format(
+        conditions=get_summary_conditions(filters),
+        order_by=order_by or "s.attendance_date DESC, emp.employee_name",
+        limit=f"LIMIT {cint(limit)}" if limit else ""
+    )
+
+def get_summary_conditions(filters):
+    # Dirty days are stale until the background job recomputes them, see get_pending_rows
+    conditions = ["s.is_dirty = 0"]
+
+    if filters.get("employee"):
+        conditions.append("s.employee = %(employee)s")
+
+    if filters.get("employees"):
+        conditions.append("s.employee IN %(employees)s")
+
+    if filters.get("shift"):
+        conditions.append("s.shift = %(shift)s")
+
+    if filters.get("department"):
+        conditions.append("emp.department = %(department)s")
+
+    if filters.get("company"):
+        conditions.append("emp.company = %(company)s")
+
+    if filters.get("late_entry"):
+        conditions.append("s.late_entry_seconds > 0")
+
+    if filters.get("early_exit"):
+        conditions.append("s.early_exit_seconds > 0")
+
+    # Keyset pagination, see iter_data
+    if filters.get("after_employee"):
+        conditions.append("""
+            (s.employee > %(after_employee)s
+                OR (s.employee = %(after_employee)s AND s.attendance_date > %(after_date)s))
+        """)
+
+    return " AND " + " AND ".join(conditions)
+
+def get_query(filters, computed_columns="", order_by=None, limit=None):
+    conditions, having = plan_filters(filters)
+
     # Main SQL query to get attendance data directly from Employee Checkin
-    query = """
-        SELECT 
+    return """
+        SELECT
             emp.name AS employee,
             emp.employee_name,
             emp.department,
@@ -151,6 +462,7 @@ def get_data(filters):
             att.status AS attendance_status,
             MIN(ci.time) AS first_checkin,
             MAX(ci.time) AS last_checkin,
+            COUNT(ci.name) AS checkin_count,
             TIME(MIN(ci.time)) AS in_time,
             TIME(MAX(ci.time)) AS out_time,
             -- Calculate working hours in seconds
@@ -159,213 +471,553 @@ def get_data(filters):
             st.start_time AS shift_start_time,
             st.end_time AS shift_end_time,
             st.name AS shift_type
-        FROM 
+            {computed_columns}
+        FROM
             `tabEmployee Checkin` ci
-        INNER JOIN 
+        INNER JOIN
             `tabEmployee` emp ON ci.employee = emp.name
-        LEFT JOIN 
-            `tabAttendance` att ON att.employee = emp.name 
+        LEFT JOIN
+            `tabAttendance` att ON att.employee = emp.name
                 AND att.attendance_date = DATE(ci.time)
-        LEFT JOIN 
+        LEFT JOIN
             `tabShift Type` st ON st.name = ci.shift
-        WHERE 
+        WHERE
             ci.time BETWEEN %(from_date)s AND %(to_date)s + INTERVAL 1 DAY
             AND ci.skip_auto_attendance = 0
             {conditions}
-        GROUP BY 
+        GROUP BY
             emp.name, DATE(ci.time)
-        ORDER BY 
-            attendance_date DESC, emp.employee_name
-    """.format(conditions=conditions)
-
-    result = frappe.db.sql(query, filters, as_dict=1)
-    
-    # Process the data
-    for row in result:
-        process_row_data(row, filters)
-    
-    return result
+        {having}
+        ORDER BY
+            {order_by}
+        {limit}
+    """.format(
+        conditions=conditions,
+        having=having,
+        computed_columns=computed_columns,
+        order_by=order_by or "attendance_date DESC, emp.employee_name",
+        limit=f"LIMIT {cint(limit)}" if limit else ""
+    )
+
+def get_payroll_query(filters, computed_columns=""):
+    """
+    Narrow checkin query for payroll and the Daily Attendance Summary: only the fields
+    needed to compute a day's seconds, joined to Shift Type alone and never formatted.
+    Filters are from_date, to_date and optionally employees
+    """
+    # Uses the (employee, time) index when employees are given
+    conditions = "AND ci.employee IN %(employees)s" if filters.get("employees") else ""
+
+    return f"""
+        SELECT
+            ci.employee,
+            MAX(ci.employee_name) AS employee_name,
+            DATE(ci.time) AS attendance_date,
+            ci.shift AS shift,
+            MIN(ci.time) AS first_checkin,
+            MAX(ci.time) AS last_checkin,
+            COUNT(ci.name) AS checkin_count,
+            TIME(MIN(ci.time)) AS in_time,
+            TIME(MAX(ci.time)) AS out_time,
+            TIMESTAMPDIFF(SECOND, MIN(ci.time), MAX(ci.time)) AS working_seconds,
+            st.start_time AS shift_start_time,
+            st.end_time AS shift_end_time,
+            st.name AS shift_type
+            {computed_columns}
+        FROM
+            `tabEmployee Checkin` ci
+        LEFT JOIN
+            `tabShift Type` st ON st.name = ci.shift
+        WHERE
+            ci.time BETWEEN %(from_date)s AND %(to_date)s + INTERVAL 1 DAY
+            AND ci.skip_auto_attendance = 0
+            {conditions}
+        GROUP BY
+            ci.employee, DATE(ci.time)
+    """
 
 def get_conditions(filters):
+    """Row level conditions of the checkin query"""
     conditions = []
-    
+
     if filters.get("employee"):
         conditions.append("emp.name = %(employee)s")
-    
+
+    # Batch callers (payroll) pass a list of employees
+    if filters.get("employees"):
+        conditions.append("emp.name IN %(employees)s")
+
     if filters.get("shift"):
         conditions.append("ci.shift = %(shift)s")
-    
+
     if filters.get("department"):
         conditions.append("emp.department = %(department)s")
-    
+
     if filters.get("company"):
         conditions.append("emp.company = %(company)s")
-    
-    # For late entry filter
-    if filters.get("late_entry"):
-        conditions.append("""
-            TIME(MIN(ci.time)) > ADDTIME(
-                st.start_time,
-                SEC_TO_TIME(COALESCE(st.late_entry_grace_period, 0) * 60)
-            )
-        """)
-    
-    # For early exit filter
-    if filters.get("early_exit"):
+
+    # Keyset pagination, see iter_data. Row level so it can use the (employee, time) index
+    if filters.get("after_employee"):
         conditions.append("""
-            TIME(MAX(ci.time)) < SUBTIME(
-                st.end_time,
-                SEC_TO_TIME(COALESCE(st.early_exit_grace_period, 0) * 60)
-            )
+            (emp.name > %(after_employee)s
+                OR (emp.name = %(after_employee)s AND ci.time >= %(after_date)s + INTERVAL 1 DAY))
         """)
-    
+
     return " AND " + " AND ".join(conditions) if conditions else ""
 
-def process_row_data(row, filters):
-    # Initialize grace period variables
-    late_entry_grace_period = 0
-    early_exit_grace_period = 0
-    
-    # Get shift type details with both grace periods
-    if row.get('shift_type'):
-        shift_doc = frappe.db.get_value('Shift Type', row['shift_type'], 
-                                       ['start_time', 'end_time', 'late_entry_grace_period', 'early_exit_grace_period'], as_dict=1)
-        if shift_doc:
-            shift_start = shift_doc.start_time
-            shift_end = shift_doc.end_time
-            late_entry_grace_period = shift_doc.late_entry_grace_period or 0
-            early_exit_grace_period = shift_doc.early_exit_grace_period or 0
-    else:
-        # Use values from row if shift_doc not available
-        shift_start = row.get('shift_start_time')
-        shift_end = row.get('shift_end_time')
-    
-    # Convert to time objects
-    shift_start_time = get_time(shift_start) if shift_start else None
-    shift_end_time = get_time(shift_end) if shift_end else None
-    
-    row['shift_start'] = shift_start_time.strftime('%H:%M:%S') if shift_start_time else ''
-    row['shift_end'] = shift_end_time.strftime('%H:%M:%S') if shift_end_time else ''
-    
+def plan_filters(filters):
+    """
+    Split the report filters for the checkin query: row predicates go to WHERE where they
+    narrow the scan, predicates on the grouped day go to HAVING so only matching days
+    reach Python
+    """
+    return get_conditions(filters), get_having_conditions(filters)
+
+def get_having_conditions(filters):
+    having = [predicate for fieldname, predicate in AGGREGATE_FILTERS if filters.get(fieldname)]
+    return "HAVING " + " AND ".join(having) if having else ""
+
+def process_row_data(row, filters, shift_rules=None):
+    if shift_rules is None and row.get('shift_type'):
+        shift_rules = load_shift_rules([row['shift_type']])
+
+    # Consider grace period if enabled
+    consider_grace = filters.get('consider_grace_period', 1)
+
+    record = compute_record(row, (shift_rules or {}).get(row.get('shift_type')), consider_grace)
+    render_row(row, record)
+
+def format_row_data(row):
+    """Format a row whose seconds were already computed by the database"""
+    render_row(row, record_from_row(row))
+
+def render_row(row, record):
+    """Report display values of an AttendanceRecord"""
+    row['shift_start'] = record.shift_start.strftime('%H:%M:%S') if record.shift_start else ''
+    row['shift_end'] = record.shift_end.strftime('%H:%M:%S') if record.shift_end else ''
+
     # Set status based on attendance
     row['status'] = row.get('attendance_status', 'Not Marked')
-    
-    # Calculate working hours
-    if row.get('working_seconds'):
-        row['working_hours'] = format_duration(row['working_seconds'])
-        
-        # Calculate late entry and early exit
-        if shift_start_time and shift_end_time:
-            # Consider grace period if enabled
-            consider_grace = filters.get('consider_grace_period', 1)
-            
-            # Convert to seconds for comparison
-            def get_seconds(value):
-                if value is None:
-                    return 0
-                elif hasattr(value, 'seconds'):  # It's a timedelta
-                    return value.seconds
-                elif hasattr(value, 'hour'):  # It's a time object
-                    return value.hour * 3600 + value.minute * 60 + value.second
-                else:
-                    # Try to parse string
-                    try:
-                        t = get_time(value)
-                        return t.hour * 3600 + t.minute * 60 + t.second
-                    except:
-                        return 0
-            
-            in_seconds = get_seconds(row.get('in_time'))
-            out_seconds = get_seconds(row.get('out_time'))
-            shift_start_seconds = get_seconds(shift_start_time)
-            shift_end_seconds = get_seconds(shift_end_time)
-            
-            # Check for late entry
-            if row.get('in_time'):
-                if consider_grace:
-                    late_threshold = shift_start_seconds + (late_entry_grace_period * 60)
-                else:
-                    late_threshold = shift_start_seconds
-                
-                if in_seconds > late_threshold:
-                    late_seconds = in_seconds - shift_start_seconds
-                    if late_seconds > 0:
-                        row['late_entry_hrs'] = format_duration(late_seconds)
-                    else:
-                        row['late_entry_hrs'] = '00:00:00'
-                else:
-                    row['late_entry_hrs'] = '00:00:00'
-            
-            # Check for early exit
-            if row.get('out_time'):
-                if consider_grace:
-                    early_threshold = shift_end_seconds - (early_exit_grace_period * 60)
-                else:
-                    early_threshold = shift_end_seconds
-                
-                if out_seconds < early_threshold:
-                    early_seconds = shift_end_seconds - out_seconds
-                    if early_seconds > 0:
-                        row['early_exit_hrs'] = format_duration(early_seconds)
-                    else:
-                        row['early_exit_hrs'] = '00:00:00'
-                else:
-                    row['early_exit_hrs'] = '00:00:00'
-            
-            # Calculate overtime
-            # Regular overtime (beyond shift end)
-            if row.get('out_time') and shift_end_seconds:
-                if out_seconds > shift_end_seconds:
-                    overtime_seconds = out_seconds - shift_end_seconds
-                    if overtime_seconds > 0:
-                        row['over_time'] = format_duration(overtime_seconds)
-                    else:
-                        row['over_time'] = '00:00:00'
-                else:
-                    row['over_time'] = '00:00:00'
-            
-            # Actual overtime (based on shift duration)
-            if shift_start_seconds and shift_end_seconds:
-                shift_duration_seconds = shift_end_seconds - shift_start_seconds
-                working_hours_float = row.get('working_seconds', 0)
-                
-                if working_hours_float > shift_duration_seconds:
-                    actual_ot_seconds = working_hours_float - shift_duration_seconds
-                    if actual_ot_seconds > 0:
-                        row['actual_over_time'] = format_duration(actual_ot_seconds)
-                    else:
-                        row['actual_over_time'] = '00:00:00'
-                else:
-                    row['actual_over_time'] = '00:00:00'
-        else:
-            row['late_entry_hrs'] = '00:00:00'
-            row['early_exit_hrs'] = '00:00:00'
-            row['over_time'] = '00:00:00'
-            row['actual_over_time'] = '00:00:00'
-    else:
-        row['working_hours'] = '00:00:00'
-        row['late_entry_hrs'] = '00:00:00'
-        row['early_exit_hrs'] = '00:00:00'
-        row['over_time'] = '00:00:00'
-        row['actual_over_time'] = '00:00:00'
-    
+    row['working_hours'] = format_seconds(record.working_seconds)
+
+    for fieldname, seconds_field in RENDERED_SECONDS:
+        seconds = getattr(record, seconds_field)
+        if seconds is not None:
+            row[fieldname] = format_seconds(seconds)
+        row[seconds_field] = seconds or 0
+
+    # Highlight flags for the report view's formatter
+    row['late_entry'] = row['late_entry_seconds'] > 0
+    row['early_exit'] = row['early_exit_seconds'] > 0
+
     # Format times - convert to string if needed
-    if row.get('in_time'):
-        if hasattr(row['in_time'], 'strftime'):  # It's a time object
-            row['in_time'] = row['in_time'].strftime('%H:%M:%S')
-        elif hasattr(row['in_time'], 'seconds'):  # It's a timedelta
-            seconds = row['in_time'].seconds
-            hours = seconds // 3600
-            minutes = (seconds % 3600) // 60
-            seconds = seconds % 60
-            row['in_time'] = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-    
-    if row.get('out_time'):
-        if hasattr(row['out_time'], 'strftime'):  # It's a time object
-            row['out_time'] = row['out_time'].strftime('%H:%M:%S')
-        elif hasattr(row['out_time'], 'seconds'):  # It's a timedelta
-            seconds = row['out_time'].seconds
+    format_checkin_times(row)
+
+def format_seconds(seconds):
+    return format_duration(seconds) if seconds and seconds > 0 else '00:00:00'
+
+def format_checkin_times(row):
+    for fieldname in ('in_time', 'out_time'):
+        value = row.get(fieldname)
+        if not value:
+            continue
+        if hasattr(value, 'strftime'):  # It's a time object
+            row[fieldname] = value.strftime('%H:%M:%S')
+        elif hasattr(value, 'seconds'):  # It's a timedelta
+            seconds = value.seconds
             hours = seconds // 3600
             minutes = (seconds % 3600) // 60
             seconds = seconds % 60
-            row['out_time'] = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
\ No newline at end of file
+            row[fieldname] = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+# Shift Window engine
+# -------------------
+# Assigns checkins to shift windows in one sorted sweep (see attendance.shift_windows)
+# instead of grouping them by calendar date in SQL.
+
+# Checkins read per query; bounds the rows a page reads past its last employee-day
+CHECKIN_CHUNK_SIZE = 5000
+
+def iter_shift_window_rows(filters, shift_rules=None):
+    """Report rows of the Shift Window engine ordered by employee and attendance date"""
+    for record, row in iter_shift_window_records(filters, shift_rules):
+        render_row(row, record)
+        yield row
+
+def iter_shift_window_records(filters, shift_rules=None):
+    """
+    (AttendanceRecord, unformatted row) per employee-day. Checkins are read in keyset chunks
+    of CHECKIN_CHUNK_SIZE rows, so stopping early (a page) reads at most one chunk too many.
+    """
+    filters = frappe._dict(filters)
+    if shift_rules is None:
+        shift_rules = load_shift_rules()
+
+    from_date, to_date = getdate(filters.from_date), getdate(filters.to_date)
+    consider_grace = filters.get('consider_grace_period', 1)
+    after = (filters.after_employee, getdate(filters.after_date)) if filters.get('after_employee') else None
+    attendance = {}
+
+    for day in iter_shift_days(iter_checkin_chunks(filters, shift_rules, attendance), shift_rules):
+        if not from_date <= day.attendance_date <= to_date:
+            continue
+        if after and (day.employee, day.attendance_date) <= after:
+            continue
+        if filters.get('shift') and day.shift != filters.shift:
+            continue
+
+        record = compute_window_record(day, shift_rules.get(day.shift), consider_grace)
+        if filters.get('late_entry') and not record.late_entry_seconds:
+            continue
+        if filters.get('early_exit') and not record.early_exit_seconds:
+            continue
+
+        yield record, get_shift_window_row(day, record, attendance)
+
+def iter_checkin_chunks(filters, shift_rules, attendance):
+    """
+    Checkins of the scan range in sweep order, one bounded query per chunk. The shifts and
+    the attendance status of each chunk's employees are loaded with it into attendance.
+    """
+    from_date, to_date = getdate(filters.from_date), getdate(filters.to_date)
+    scan_start, scan_end = get_scan_bounds(from_date, to_date, shift_rules)
+    values = dict(get_query_values(filters), scan_start=scan_start, scan_end=scan_end,
+        chunk_size=CHECKIN_CHUNK_SIZE)
+    if filters.get('after_employee'):
+        # Resume at the first checkin that can belong to a day after the key
+        values['resume_time'] = get_scan_bounds(add_days(getdate(filters.after_date), 1), to_date, shift_rules)[0]
+
+    last = None
+    while True:
+        if last:
+            values.update(last_employee=last.employee, last_time=last.time, last_name=last.name)
+        checkins = frappe.db.sql(get_checkin_query(filters, after_checkin=bool(last), chunked=True), values, as_dict=1)
+        if not checkins:
+            return
+
+        employees = list({checkin.employee for checkin in checkins})
+        shift_index = load_shift_index(scan_start, scan_end, employees=employees, default_shifts={})
+        # The last day of the previous chunk is still open until this chunk's first checkin
+        if last:
+            for key in [key for key in attendance if key[0] < last.employee]:
+                del attendance[key]
+        attendance.update(get_attendance_status(employees, from_date, to_date))
+
+        yield from resolve_checkin_shifts(checkins, shift_index)
+
+        if len(checkins) < CHECKIN_CHUNK_SIZE:
+            return
+        last = checkins[-1]
+
+def resolve_checkin_shifts(checkins, shift_index):
+    """Checkins without a shift get the one assigned for their day, else the default shift"""
+    for checkin in checkins:
+        if not checkin.shift:
+            checkin.shift = shift_index.get_shift(checkin.employee, checkin.time) or checkin.default_shift
+        yield checkin
+
+def get_checkin_query(filters, after_checkin=False, chunked=False):
+    """
+    Checkins of the scan range ordered for a single sweep, served by the (employee, time)
+    index. after_checkin continues after %(last_employee)s, %(last_time)s, %(last_name)s and
+    chunked reads at most %(chunk_size)s rows.
+    """
+    conditions = []
+
+    if filters.get("employee"):
+        conditions.append("ci.employee = %(employee)s")
+
+    if filters.get("employees"):
+        conditions.append("ci.employee IN %(employees)s")
+
+    if filters.get("department"):
+        conditions.append("emp.department = %(department)s")
+
+    if filters.get("company"):
+        conditions.append("emp.company = %(company)s")
+
+    # Keyset pagination; days up to the key are skipped by the sweep
+    if filters.get("after_employee"):
+        conditions.append("""(ci.employee > %(after_employee)s
+            OR (ci.employee = %(after_employee)s AND ci.time >= %(resume_time)s))""")
+
+    if after_checkin:
+        conditions.append("""(ci.employee > %(last_employee)s
+            OR (ci.employee = %(last_employee)s AND (ci.time > %(last_time)s
+                OR (ci.time = %(last_time)s AND ci.name > %(last_name)s))))""")
+
+    return """
+        SELECT
+            ci.name,
+            ci.employee,
+            ci.time,
+            ci.shift,
+            emp.default_shift,
+            emp.employee_name,
+            emp.department,
+            emp.company
+        FROM
+            `tabEmployee Checkin` ci
+        INNER JOIN
+            `tabEmployee` emp ON ci.employee = emp.name
+        WHERE
+            ci.time BETWEEN %(scan_start)s AND %(scan_end)s
+            AND ci.skip_auto_attendance = 0
+            {conditions}
+        ORDER BY
+            ci.employee, ci.time, ci.name
+        {limit}
+    """.format(
+        conditions=" AND " + " AND ".join(conditions) if conditions else "",
+        limit="LIMIT %(chunk_size)s" if chunked else ""
+    )
+
+def get_attendance_status(employees, from_date, to_date):
+    """(employee, attendance date) -> (Attendance, status) of employees in the range"""
+    if not employees:
+        return {}
+
+    rows = frappe.db.sql("""
+        SELECT att.employee, att.attendance_date, att.name, att.status
+        FROM `tabAttendance` att
+        WHERE att.employee IN %(employees)s
+            AND att.attendance_date BETWEEN %(from_date)s AND %(to_date)s
+            AND att.docstatus < 2
+    """, {"employees": employees, "from_date": from_date, "to_date": to_date}, as_dict=1)
+
+    return {(row.employee, getdate(row.attendance_date)): (row.name, row.status) for row in rows}
+
+def get_shift_window_row(day, record, attendance):
+    attendance_id, attendance_status = attendance.get((day.employee, day.attendance_date), (None, None))
+
+    return frappe._dict(
+        employee=day.employee,
+        employee_name=day.source.employee_name,
+        department=day.source.department,
+        company=day.source.company,
+        attendance_date=day.attendance_date,
+        shift=day.shift,
+        attendance_id=attendance_id,
+        attendance_status=attendance_status,
+        first_checkin=day.first_checkin,
+        last_checkin=day.last_checkin,
+        checkin_count=day.checkin_count,
+        in_time=day.first_checkin.time(),
+        out_time=day.last_checkin.time(),
+        working_seconds=record.working_seconds,
+        shift_start_time=record.shift_start,
+        shift_end_time=record.shift_end,
+        shift_type=record.shift_type
+    )
+
+# Grouped mode
+# ------------
+# Period totals per employee, department or shift aggregated by the database. Each group
+# drills down to its per-day rows in the report view.
+
+GROUP_LEVELS = {
+    'Employee': {
+        'select': "d.employee, MAX(d.employee_name) AS employee_name, MAX(d.department) AS department",
+        'group_by': "d.employee",
+        'fieldnames': ('employee', 'employee_name', 'department'),
+    },
+    'Department': {
+        'select': "d.department",
+        'group_by': "d.department",
+        'fieldnames': ('department',),
+    },
+    'Shift': {
+        'select': "d.shift",
+        'group_by': "d.shift",
+        'fieldnames': ('shift',),
+    },
+}
+
+GROUP_TOTALS = (
+    ('working_seconds', 'working_hours'),
+    ('late_entry_seconds', 'late_entry_hrs'),
+    ('early_exit_seconds', 'early_exit_hrs'),
+    ('over_time_seconds', 'over_time'),
+    ('actual_over_time_seconds', 'actual_over_time'),
+)
+
+def get_group_columns(group_by):
+    level = get_group_level(group_by)
+    key_columns = [column for column in get_columns() if column['fieldname'] in level['fieldnames']]
+
+    return [
+        *key_columns,
+        {'label': _('Days'), 'fieldname': 'days', 'fieldtype': 'Int', 'width': 80},
+        {'label': _('Late Days'), 'fieldname': 'late_days', 'fieldtype': 'Int', 'width': 90},
+        {'label': _('Early Exit Days'), 'fieldname': 'early_exit_days', 'fieldtype': 'Int', 'width': 110},
+        {'label': _('Working Hours'), 'fieldname': 'working_hours', 'fieldtype': 'Data', 'width': 120},
+        {'label': _('Late Entry By'), 'fieldname': 'late_entry_hrs', 'fieldtype': 'Data', 'width': 120},
+        {'label': _('Early Exit By'), 'fieldname': 'early_exit_hrs', 'fieldtype': 'Data', 'width': 120},
+        {'label': _('Overtime'), 'fieldname': 'over_time', 'fieldtype': 'Data', 'width': 100},
+        {'label': _('Actual Overtime'), 'fieldname': 'actual_over_time', 'fieldtype': 'Data', 'width': 120},
+    ]
+
+def get_group_level(group_by):
+    if group_by not in GROUP_LEVELS:
+        frappe.throw(_("Cannot group by {0}").format(group_by))
+    return GROUP_LEVELS[group_by]
+
+def get_grouped_data(filters):
+    filters = frappe._dict(filters)
+    level = get_group_level(filters.group_by)
+    engine = get_engine(filters)
+
+    # Not expressible in SQL, the days are summed while they stream
+    if engine == 'Shift Window':
+        return get_shift_window_groups(filters, level)
+
+    rows = frappe.db.sql(get_grouped_query(filters, level, engine), get_query_values(filters), as_dict=1)
+    if engine == 'Daily Summary':
+        rows = add_pending_days(rows, filters, level)
+
+    for row in rows:
+        format_group_row(row)
+
+    return rows
+
+def get_grouped_query(filters, level, engine):
+    # Stored days when the summary applies, otherwise the SQL engine (same rules as Python)
+    if engine == 'Daily Summary':
+        day_query = get_summary_query(filters)
+    else:
+        day_query = get_query(filters, computed_columns=SQL_ENGINE_COLUMNS)
+
+    totals = ",\n            ".join(
+        f"SUM(COALESCE(d.{seconds_field}, 0)) AS {seconds_field}" for seconds_field, fieldname in GROUP_TOTALS
+    )
+    return """
+        SELECT
+            {keys},
+            COUNT(*) AS days,
+            SUM(d.late_entry_seconds > 0) AS late_days,
+            SUM(d.early_exit_seconds > 0) AS early_exit_days,
+            {totals}
+        FROM
+            ({day_query}) d
+        GROUP BY
+            {group_by}
+        ORDER BY
+            {group_by}
+    """.format(keys=level['select'], totals=totals, day_query=day_query, group_by=level['group_by'])
+
+def add_pending_days(rows, filters, level):
+    """Add the pending days of the range (see get_pending_rows) to the stored days' group totals"""
+    pending_rows = get_pending_rows(filters)
+    if not pending_rows:
+        return rows
+
+    groups = {tuple(row.get(fieldname) for fieldname in level['fieldnames']): row for row in rows}
+    for row in pending_rows:
+        add_group_day(groups, level, row, record_from_row(row))
+
+    return sort_groups(groups)
+
+def get_shift_window_groups(filters, level):
+    groups = {}
+    for record, row in iter_shift_window_records(filters):
+        add_group_day(groups, level, row, record)
+
+    rows = sort_groups(groups)
+    for row in rows:
+        format_group_row(row)
+
+    return rows
+
+def add_group_day(groups, level, row, record):
+    key = tuple(row.get(fieldname) for fieldname in level['fieldnames'])
+    group = groups.get(key)
+    if group is None:
+        group = groups[key] = frappe._dict(zip(level['fieldnames'], key, strict=True), days=0, late_days=0, early_exit_days=0)
+        group.update({seconds_field: 0 for seconds_field, fieldname in GROUP_TOTALS})
+
+    group.days += 1
+    group.late_days += 1 if record.late_entry_seconds else 0
+    group.early_exit_days += 1 if record.early_exit_seconds else 0
+    for seconds_field, _fieldname in GROUP_TOTALS:
+        group[seconds_field] += getattr(record, seconds_field) or 0
+
+def sort_groups(groups):
+    return [groups[key] for key in sorted(groups, key=lambda key: tuple(value or '' for value in key))]
+
+def format_group_row(row):
+    row['late_days'] = cint(row.get('late_days'))
+    row['early_exit_days'] = cint(row.get('early_exit_days'))
+    for seconds_field, fieldname in GROUP_TOTALS:
+        row[seconds_field] = cint(row.get(seconds_field))
+        row[fieldname] = format_seconds(row[seconds_field])
+
+# Streaming
+# ---------
+# Pages through the result by (employee, attendance date) so memory stays bounded
+# whatever the date range. Used by the chunked export and the paged report UI.
+
+STREAM_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 5000
+# Rows per request of the lazily loaded report view, same as PAGE_SIZE in the .js
+LAZY_PAGE_SIZE = 500
+
+KEYSET_ORDER = {
+    'Daily Summary': "s.employee, s.attendance_date",
+    'SQL': "emp.name, attendance_date",
+    'Python': "emp.name, attendance_date",
+}
+
+def iter_data(filters, page_size=STREAM_PAGE_SIZE, after=None, shift_rules=None):
+    """
+    Yield pages of processed rows ordered by employee and attendance date, starting after
+    the (employee, attendance date) key after. Used by the dataset export
+    """
+    filters = frappe._dict(filters)
+    if shift_rules is None:
+        shift_rules = load_shift_rules()
+    after_employee, after_date = after or (None, None)
+
+    while True:
+        rows = get_page_data(filters, after_employee, after_date, page_size, shift_rules)
+        if rows:
+            yield rows
+
+        if len(rows) < page_size:
+            return
+        after_employee, after_date = rows[-1].employee, rows[-1].attendance_date
+
+def get_page_data(filters, after_employee=None, after_date=None, page_size=STREAM_PAGE_SIZE, shift_rules=None):
+    engine = get_engine(filters)
+    page_filters = frappe._dict(filters, after_employee=after_employee, after_date=after_date)
+    if engine == 'Shift Window':
+        return list(islice(iter_shift_window_rows(page_filters, shift_rules), page_size))
+
+    if engine == 'Daily Summary':
+        rows = get_summary_rows(page_filters, order_by=KEYSET_ORDER[engine], limit=page_size)
+    else:
+        query = get_engine_query(page_filters, engine, order_by=KEYSET_ORDER.get(engine), limit=page_size)
+
+        # The unbuffered cursor has to be drained before any other query runs on the connection
+        with frappe.db.unbuffered_cursor():
+            rows = list(frappe.db.sql(query, get_query_values(page_filters), as_dict=1, as_iterator=True))
+
+    return process_rows(rows, page_filters, engine, shift_rules)
+
+@frappe.whitelist()
+@instrument('attendance_report.get_page')
+def get_page(filters, after_employee=None, after_date=None, page_size=LAZY_PAGE_SIZE):
+    """One page of report rows and the key to request the next one with"""
+    check_report_permission()
+
+    page_size = min(cint(page_size) or STREAM_PAGE_SIZE, MAX_PAGE_SIZE)
+    rows = get_page_data(frappe.parse_json(filters), after_employee, after_date, page_size)
+
+    next_page = None
+    if len(rows) == page_size:
+        next_page = {"after_employee": rows[-1].employee, "after_date": rows[-1].attendance_date}
+
+    return {"rows": rows, "next": next_page}
+
+def check_report_permission():
+    if not frappe.get_doc("Report", "Custom Shift Attendance").is_permitted():
+        frappe.throw(_("Not permitted"), frappe.PermissionError)
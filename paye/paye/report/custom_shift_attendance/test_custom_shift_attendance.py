@@ -0,0 +1,123 @@
+import random
+from datetime import datetime, timedelta
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from paye.attendance.records import compute_record
+from paye.attendance.shift_rules import compile_shift_rule
+from paye.paye.report.custom_shift_attendance.custom_shift_attendance import SQL_ENGINE_COLUMNS
+
+SECONDS_FIELDS = ("late_entry_seconds", "early_exit_seconds", "over_time_seconds", "actual_over_time_seconds")
+
+# One employee-day: first/last checkin and the shift (None for checkins without one)
+CASES = (
+    # Regular day shift, late and overtime
+    ("2026-01-05 09:20:00", "2026-01-05 18:45:00", ("09:00:00", "18:00:00", 15, 15)),
+    # Inside both grace periods
+    ("2026-01-05 09:10:00", "2026-01-05 17:50:00", ("09:00:00", "18:00:00", 15, 15)),
+    # Early exit
+    ("2026-01-05 08:55:00", "2026-01-05 16:00:00", ("09:00:00", "18:00:00", 15, 15)),
+    # Without grace periods
+    ("2026-01-05 09:01:00", "2026-01-05 17:59:00", ("09:00:00", "18:00:00", 0, 0)),
+    # First checkin exactly at midnight
+    ("2026-01-05 00:00:00", "2026-01-05 18:30:00", ("09:00:00", "18:00:00", 15, 15)),
+    # Last checkin exactly at midnight
+    ("2026-01-05 09:30:00", "2026-01-06 00:00:00", ("09:00:00", "18:00:00", 15, 15)),
+    # Overnight shift
+    ("2026-01-05 22:20:00", "2026-01-06 06:30:00", ("22:00:00", "06:00:00", 10, 10)),
+    # Overnight shift, both checkins after midnight
+    ("2026-01-06 01:00:00", "2026-01-06 05:00:00", ("22:00:00", "06:00:00", 10, 10)),
+    # Shift starting at midnight
+    ("2026-01-05 00:30:00", "2026-01-05 08:30:00", ("00:00:00", "08:00:00", 5, 5)),
+    # Single checkin, zero duration
+    ("2026-01-05 09:30:00", "2026-01-05 09:30:00", ("09:00:00", "18:00:00", 15, 15)),
+    # No shift
+    ("2026-01-05 09:30:00", "2026-01-05 18:30:00", None),
+)
+
+
+class TestCustomShiftAttendance(FrappeTestCase):
+    def test_sql_engine_matches_python_engine(self):
+        for first_checkin, last_checkin, shift in CASES:
+            for consider_grace in (1, 0):
+                with self.subTest(first_checkin=first_checkin, last_checkin=last_checkin, shift=shift,
+                        consider_grace=consider_grace):
+                    self.assertEngineParity(first_checkin, last_checkin, shift, consider_grace)
+
+    def test_sql_engine_matches_python_engine_on_random_days(self):
+        rng = random.Random(42)
+        day = datetime(2026, 1, 5)
+        for _ in range(200):
+            first_checkin = day + timedelta(seconds=rng.randrange(0, 86400))
+            last_checkin = first_checkin + timedelta(seconds=rng.choice((0, rng.randrange(0, 16 * 3600))))
+            start = timedelta(seconds=rng.randrange(0, 86400, 300))
+            end = timedelta(seconds=rng.randrange(0, 86400, 300))
+            shift = (str(start), str(end), rng.randrange(0, 30), rng.randrange(0, 30))
+
+            with self.subTest(first_checkin=first_checkin, last_checkin=last_checkin, shift=shift):
+                self.assertEngineParity(str(first_checkin), str(last_checkin), shift, rng.choice((0, 1)))
+
+    def assertEngineParity(self, first_checkin, last_checkin, shift, consider_grace):
+        row = get_sql_engine_row(first_checkin, last_checkin, shift, consider_grace)
+
+        shift_rule = None
+        if shift:
+            shift_rule = compile_shift_rule(frappe._dict(
+                name=row.shift_type,
+                start_time=row.shift_start_time,
+                end_time=row.shift_end_time,
+                late_entry_grace_period=shift[2],
+                early_exit_grace_period=shift[3],
+            ))
+        record = compute_record(row, shift_rule, consider_grace)
+
+        for fieldname in SECONDS_FIELDS:
+            sql_value = row[fieldname]
+            self.assertEqual(
+                None if sql_value is None else int(sql_value),
+                getattr(record, fieldname),
+                fieldname
+            )
+
+
+def get_sql_engine_row(first_checkin, last_checkin, shift, consider_grace):
+    """Evaluate SQL_ENGINE_COLUMNS over two checkins and a shift given as literals"""
+    start_time, end_time, late_entry_grace_period, early_exit_grace_period = shift or (None, None, None, None)
+
+    return frappe.db.sql(f"""
+        SELECT
+            TIME(MIN(ci.time)) AS in_time,
+            TIME(MAX(ci.time)) AS out_time,
+            TIMESTAMPDIFF(SECOND, MIN(ci.time), MAX(ci.time)) AS working_seconds,
+            st.start_time AS shift_start_time,
+            st.end_time AS shift_end_time,
+            st.name AS shift_type
+            {SQL_ENGINE_COLUMNS}
+        FROM
+            (
+                SELECT CAST(%(first_checkin)s AS DATETIME) AS time
+                UNION ALL
+                SELECT CAST(%(last_checkin)s AS DATETIME)
+            ) ci
+        LEFT JOIN
+            (
+                SELECT
+                    'Parity Test Shift' AS name,
+                    CAST(%(start_time)s AS TIME) AS start_time,
+                    CAST(%(end_time)s AS TIME) AS end_time,
+                    %(late_entry_grace_period)s AS late_entry_grace_period,
+                    %(early_exit_grace_period)s AS early_exit_grace_period
+            ) st ON %(has_shift)s
+        GROUP BY
+            st.name
+    """, {
+        "first_checkin": first_checkin,
+        "last_checkin": last_checkin,
+        "start_time": start_time,
+        "end_time": end_time,
+        "late_entry_grace_period": late_entry_grace_period,
+        "early_exit_grace_period": early_exit_grace_period,
+        "has_shift": 1 if shift else 0,
+        "consider_grace": consider_grace,
+    }, as_dict=1)[0]
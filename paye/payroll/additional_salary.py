@@ -0,0 +1,185 @@
+import frappe
+from frappe.utils import getdate
+
+from paye.attendance.shift_rules import load_shift_rules
+from paye.instrumentation import instrument
+
+
+def queue_additional_salaries(salary_slip):
+    """
+    Collect submitted slips of the current request/job and create their overtime and
+    lateness Additional Salary records in one background job after commit.
+    """
+    pending = getattr(frappe.local, "paye_pending_additional_salaries", None)
+    if pending is None:
+        pending = frappe.local.paye_pending_additional_salaries = []
+        frappe.db.after_commit.add(enqueue_pending_additional_salaries)
+        frappe.db.after_rollback.add(clear_pending_additional_salaries)
+
+    pending.append(salary_slip)
+
+
+def enqueue_pending_additional_salaries():
+    salary_slips = getattr(frappe.local, "paye_pending_additional_salaries", None)
+    frappe.local.paye_pending_additional_salaries = None
+    if not salary_slips:
+        return
+
+    frappe.enqueue(
+        "paye.payroll.additional_salary.create_additional_salaries",
+        queue="long",
+        salary_slips=salary_slips
+    )
+
+
+def clear_pending_additional_salaries():
+    frappe.local.paye_pending_additional_salaries = None
+
+
+@instrument("additional_salary.create")
+def create_additional_salaries(salary_slips):
+    """
+    Create the overtime/lateness rows of submitted salary slips as submitted Additional
+    Salary records, then link the slip rows to them with one update.
+
+    Each record is inserted and submitted through the document, so the HRMS validations
+    (dates, overlapping records) and the version history run as for a manual entry. The job
+    runs after commit, off the request path. A row that fails validation is logged and
+    skipped; the other rows are still created.
+
+    Records keep the naming series. Each one carries a unique attendance key of (employee,
+    component, payroll date), so jobs running at the same time for the same period converge
+    on one record per key without a lock.
+    """
+    rows = get_unlinked_attendance_rows(salary_slips)
+    if not rows:
+        return
+
+    existing = get_existing_additional_salaries(rows)
+    links = {}
+
+    for row in rows:
+        key = (row.employee, row.salary_component, row.start_date, row.end_date)
+        if key not in existing:
+            existing[key] = insert_additional_salary(row)
+
+        if existing[key]:
+            links[row.row_name] = existing[key]
+
+    link_salary_details(links)
+
+
+def insert_additional_salary(row):
+    """Insert and submit the Additional Salary of a slip row. Returns its name, None if it failed"""
+    attendance_key = get_attendance_key(row.employee, row.salary_component, row.end_date)
+    savepoint = "paye_additional_salary"
+    frappe.db.savepoint(savepoint)
+    try:
+        additional_salary = frappe.get_doc({
+            "doctype": "Additional Salary",
+            "employee": row.employee,
+            "company": row.company,
+            "salary_component": row.salary_component,
+            "type": "Earning" if row.parentfield == "earnings" else "Deduction",
+            "amount": row.amount,
+            "payroll_date": row.end_date,
+            "custom_paye_attendance_key": attendance_key,
+        })
+        additional_salary.insert()
+        additional_salary.submit()
+        return additional_salary.name
+    except frappe.UniqueValidationError:
+        # Another job inserted the same key first, its record is the one linked
+        frappe.db.rollback(save_point=savepoint)
+        return frappe.db.get_value("Additional Salary", {"custom_paye_attendance_key": attendance_key})
+    except Exception:
+        frappe.db.rollback(save_point=savepoint)
+        # HRMS rejects a duplicate itself when the other job committed before validate ran
+        name = frappe.db.get_value("Additional Salary", {"custom_paye_attendance_key": attendance_key})
+        if not name:
+            frappe.log_error(title=f"Additional Salary for Salary Slip {row.parent} failed")
+        return name
+
+
+def get_attendance_key(employee, salary_component, payroll_date):
+    return f"{employee}|{salary_component}|{getdate(payroll_date)}"
+
+
+def release_attendance_key(doc, method=None):
+    """Additional Salary on_cancel: free the attendance key so a replacement record can take it"""
+    if doc.get("custom_paye_attendance_key"):
+        doc.db_set("custom_paye_attendance_key", None)
+
+
+def get_attendance_components():
+    components = {"Overtime", "Lateness"}
+    for rule in load_shift_rules().values():
+        components.update(filter(None, (rule.overtime_salary_component, rule.lateness_salary_component)))
+    return list(components)
+
+
+def get_unlinked_attendance_rows(salary_slips):
+    """Overtime/lateness rows of submitted slips that no Additional Salary backs yet"""
+    return frappe.db.sql("""
+        SELECT
+            sd.name AS row_name,
+            sd.parent,
+            sd.parentfield,
+            sd.salary_component,
+            sd.amount,
+            ss.employee,
+            ss.employee_name,
+            ss.department,
+            ss.company,
+            ss.start_date,
+            ss.end_date
+        FROM
+            `tabSalary Detail` sd
+        INNER JOIN
+            `tabSalary Slip` ss ON ss.name = sd.parent
+        WHERE
+            sd.parenttype = 'Salary Slip'
+            AND sd.parent IN %(salary_slips)s
+            AND ss.docstatus = 1
+            AND IFNULL(sd.additional_salary, '') = ''
+            AND sd.salary_component IN %(components)s
+            AND sd.amount > 0
+    """, {"salary_slips": salary_slips, "components": get_attendance_components()}, as_dict=1)
+
+
+def get_existing_additional_salaries(rows):
+    """(employee, component, start, end) -> submitted Additional Salary already in the period"""
+    existing = {}
+    periods = {(row.start_date, row.end_date) for row in rows}
+    for start_date, end_date in periods:
+        for additional_salary in frappe.get_all(
+            "Additional Salary",
+            filters={
+                "employee": ["in", list({row.employee for row in rows})],
+                "salary_component": ["in", list({row.salary_component for row in rows})],
+                "payroll_date": ["between", [start_date, end_date]],
+                "docstatus": 1
+            },
+            fields=["name", "employee", "salary_component"]
+        ):
+            key = (additional_salary.employee, additional_salary.salary_component, start_date, end_date)
+            existing.setdefault(key, additional_salary.name)
+
+    return existing
+
+
+def link_salary_details(links):
+    """Set Salary Detail.additional_salary for many rows with one statement"""
+    if not links:
+        return
+
+    cases = " ".join(["WHEN %s THEN %s"] * len(links))
+    params = [value for pair in links.items() for value in pair]
+    frappe.db.sql(
+        f"""
+        UPDATE `tabSalary Detail`
+        SET additional_salary = CASE name {cases} END
+        WHERE name IN %s
+        """,
+        (*params, tuple(links))
+    )
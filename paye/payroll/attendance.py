@@ -0,0 +1,140 @@
+import frappe
+
+from paye.attendance.cache import cache_attendance_seconds, get_cached_attendance_seconds
+from paye.attendance.shift_assignments import load_shift_index
+from paye.attendance.shift_rules import load_shift_rules
+
+
+def get_attendance_totals(employees, start_date, end_date, shift_rules=None):
+    """
+    Return overtime/lateness seconds and amounts for every employee in the period.
+    All employees are read with one indexed query on Daily Attendance Summary, or from
+    the attendance cache when already read for the period.
+    Each day's seconds are priced with the rates of the shift that applied on that day;
+    shift rules can be passed in when already loaded.
+    """
+    employees = list(dict.fromkeys(employees))
+    totals = {employee: new_totals() for employee in employees}
+    if not employees:
+        return totals
+
+    # Seconds already read for the period by another slip or report are reused
+    cached = get_cached_attendance_seconds(start_date, end_date)
+    missing = [employee for employee in employees if employee not in cached]
+    if missing:
+        fetched = get_attendance_seconds(missing, start_date, end_date)
+        cache_attendance_seconds(start_date, end_date, fetched)
+        cached = {**cached, **fetched}
+
+    shift_rules = dict(shift_rules or {})
+    unloaded = {shift for employee in employees for shift in cached[employee] if shift not in shift_rules}
+    if unloaded:
+        shift_rules.update(load_shift_rules(unloaded))
+
+    for employee, employee_totals in totals.items():
+        apply_shift_rates(employee_totals, cached[employee], shift_rules)
+
+    return totals
+
+
+def get_attendance_seconds(employees, start_date, end_date):
+    """
+    Employee -> shift -> (overtime seconds, lateness seconds) from one query on Daily
+    Attendance Summary. Days still flagged dirty or not in the summary yet are computed
+    from their checkins instead, nothing is written. Each day counts for the shift that
+    applied on it (Shift Assignment or the default shift), the stored shift is only used
+    when the employee has neither.
+    """
+    from paye.paye.doctype.daily_attendance_summary.daily_attendance_summary import (
+        compute_days,
+        get_dirty_days,
+        get_unsummarized_days,
+    )
+
+    values = {"employees": employees, "from_date": start_date, "to_date": end_date}
+    shift_index = load_shift_index(start_date, end_date, employees)
+    seconds = {employee: {} for employee in employees}
+    for row in frappe.db.sql(get_summary_seconds_query(), values, as_dict=1):
+        shift = shift_index.get_shift(row.employee, row.attendance_date) or row.shift
+        add_shift_seconds(seconds[row.employee], shift, row.over_time_seconds, row.late_entry_seconds)
+
+    # Days still flagged dirty, or with checkins but no summary row yet (e.g. before the backfill ran)
+    pending_days = get_dirty_days(start_date, end_date, employees)
+    pending_days |= get_unsummarized_days(start_date, end_date, employees)
+    for day in compute_days(pending_days):
+        shift = shift_index.get_shift(day.employee, day.attendance_date) or day.shift
+        add_shift_seconds(seconds[day.employee], shift, day.over_time_seconds, day.late_entry_seconds)
+
+    return seconds
+
+
+def add_shift_seconds(shift_seconds, shift, over_time_seconds, late_entry_seconds):
+    previous_over_time, previous_late_entry = shift_seconds.get(shift, (0, 0))
+    shift_seconds[shift] = (
+        previous_over_time + int(over_time_seconds or 0), previous_late_entry + int(late_entry_seconds or 0)
+    )
+
+
+def get_summary_seconds_query():
+    return """
+        SELECT
+            employee,
+            attendance_date,
+            shift,
+            over_time_seconds,
+            late_entry_seconds
+        FROM
+            `tabDaily Attendance Summary`
+        WHERE
+            employee IN %(employees)s
+            AND attendance_date BETWEEN %(from_date)s AND %(to_date)s
+            AND is_dirty = 0
+            AND (over_time_seconds > 0 OR late_entry_seconds > 0)
+    """
+
+
+def get_period_shifts(employees, start_date, end_date):
+    """Employee -> shift that applied on most days of the period, from Shift Assignment or the default shift"""
+    shift_index = load_shift_index(start_date, end_date, employees)
+    return {employee: shift_index.get_period_shift(employee, start_date, end_date) for employee in employees}
+
+
+def apply_shift_rates(employee_totals, shift_seconds, shift_rules):
+    """
+    Price the overtime/lateness seconds of each shift with that shift's rates. The salary
+    components are those of the shift with the largest amount, one row each on the slip
+    """
+    overtime_components, lateness_components = {}, {}
+    for shift, (overtime_seconds, lateness_seconds) in shift_seconds.items():
+        employee_totals.overtime_seconds += overtime_seconds
+        employee_totals.lateness_seconds += lateness_seconds
+
+        shift_rule = shift_rules.get(shift)
+        if not shift_rule:
+            continue
+
+        overtime_amount = shift_rule.overtime_pay * (overtime_seconds / 3600)
+        lateness_amount = shift_rule.lateness_fine * (lateness_seconds / 3600)
+        employee_totals.overtime_amount += overtime_amount
+        employee_totals.lateness_amount += lateness_amount
+
+        overtime_component = shift_rule.overtime_salary_component or "Overtime"
+        lateness_component = shift_rule.lateness_salary_component or "Lateness"
+        overtime_components[overtime_component] = overtime_components.get(overtime_component, 0) + overtime_amount
+        lateness_components[lateness_component] = lateness_components.get(lateness_component, 0) + lateness_amount
+
+    if overtime_components:
+        employee_totals.overtime_component = max(overtime_components, key=overtime_components.get)
+    if lateness_components:
+        employee_totals.lateness_component = max(lateness_components, key=lateness_components.get)
+
+
+def new_totals():
+    return frappe._dict(
+        overtime_seconds=0,
+        lateness_seconds=0,
+        overtime_amount=0.0,
+        lateness_amount=0.0,
+        overtime_component="Overtime",
+        lateness_component="Lateness"
+    )
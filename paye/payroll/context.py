@@ -0,0 +1,93 @@
+import frappe
+
+from paye.attendance.shift_rules import load_shift_rules
+from paye.paye.doctype.attendance_period_snapshot.attendance_period_snapshot import get_snapshot_totals
+from paye.payroll.attendance import get_attendance_totals, get_period_shifts
+
+COMPANY_FIELDS = ("enable_13th_month_tax", "country", "default_currency")
+
+
+class PayrollRunContext:
+    """
+    Metadata shared by every salary slip of one payroll run: Company flags, the shift of
+    each employee in the period, shift rates/salary components and the period's attendance totals
+    (frozen in Attendance Period Snapshot once the period is closed).
+    """
+
+    def __init__(self, company, employees, start_date, end_date):
+        self.employees = list(dict.fromkeys(employees))
+        self.start_date = start_date
+        self.end_date = end_date
+
+        self.company = frappe._dict(
+            frappe.db.get_value("Company", company, COMPANY_FIELDS, as_dict=True) or {}
+        )
+        self.company.name = company
+
+        self.shifts = get_period_shifts(self.employees, start_date, end_date) if self.employees else {}
+        self.shift_rules = load_shift_rules(self.shifts.values())
+        self._attendance_totals = None
+
+    def has_employee(self, employee):
+        return employee in self.shifts
+
+    def get_attendance_totals(self, employee):
+        # Loaded for the whole run on first use. Closed periods are read from their
+        # snapshots, only employees without one are computed
+        if self._attendance_totals is None:
+            self._attendance_totals = get_snapshot_totals(self.employees, self.start_date, self.end_date)
+            missing = [employee for employee in self.employees if employee not in self._attendance_totals]
+            if missing:
+                self._attendance_totals.update(get_attendance_totals(
+                    missing,
+                    self.start_date,
+                    self.end_date,
+                    shift_rules=self.shift_rules
+                ))
+
+        return self._attendance_totals.get(employee)
+
+
+def _get_cache():
+    cache = getattr(frappe.local, "paye_payroll_run_contexts", None)
+    if cache is None:
+        cache = frappe.local.paye_payroll_run_contexts = {}
+    return cache
+
+
+def prepare_payroll_run_context(payroll_entry, company, employees, start_date, end_date):
+    """
+    Build the Payroll Entry context for a subset of its employees, e.g. one shard of a
+    sharded run, so the job does not load data for employees it does not process.
+    """
+    context = PayrollRunContext(company, employees, str(start_date), str(end_date))
+    _get_cache()[("Payroll Entry", payroll_entry, str(start_date), str(end_date))] = context
+    return context
+
+
+def get_payroll_run_context(salary_slip):
+    """
+    Context of the slip's Payroll Entry, built once per request/job and reused by all its
+    slips. Slips outside a Payroll Entry get a context of their own.
+    """
+    cache = _get_cache()
+    period = (str(salary_slip.start_date), str(salary_slip.end_date))
+
+    if salary_slip.payroll_entry:
+        key = ("Payroll Entry", salary_slip.payroll_entry, *period)
+        if key not in cache:
+            employees = frappe.get_all(
+                "Payroll Employee Detail",
+                filters={"parent": salary_slip.payroll_entry, "parenttype": "Payroll Entry"},
+                pluck="employee"
+            )
+            cache[key] = PayrollRunContext(salary_slip.company, employees, *period)
+
+        if cache[key].has_employee(salary_slip.employee):
+            return cache[key]
+
+    key = ("Salary Slip", salary_slip.company, salary_slip.employee, *period)
+    if key not in cache:
+        cache[key] = PayrollRunContext(salary_slip.company, [salary_slip.employee], *period)
+
+    return cache[key]
@@ -0,0 +1,264 @@
+"""
+Vectorized PAYE projection with the 13th month for a whole company.
+
+Mirrors CustomSalarySlip: annual taxable earnings are the earnings already paid in the
+payroll period, plus the current month for every remaining period, plus one more month
+(the 13th month projection), minus exemptions. The annual tax comes from the Income Tax
+Slab and is spread over the remaining periods. Used for payroll previews and to
+cross-check slip results.
+"""
+
+import frappe
+import numpy as np
+from frappe import _
+from frappe.utils import cint, flt, getdate, month_diff
+
+
+def compute_slab_tax(annual_taxable, slabs):
+    """
+    Tax of each annual taxable amount under an Income Tax Slab, same rules as HRMS
+    (inclusive slab bounds, a to_amount of 0 means no upper bound).
+
+    slabs: array of (from_amount, to_amount, percent_deduction) rows
+    """
+    slabs = np.asarray(slabs, dtype=float).reshape(-1, 3)
+    annual_taxable = np.asarray(annual_taxable, dtype=float)
+    if not len(slabs):
+        return np.zeros_like(annual_taxable)
+
+    lower = slabs[:, 0]
+    upper = np.where(slabs[:, 1] > 0, slabs[:, 1], np.inf)
+    rate = slabs[:, 2] / 100
+
+    # employees x slabs
+    income = annual_taxable[:, None]
+    taxable_in_slab = np.where(income >= lower, np.minimum(income, upper) - lower + 1, 0)
+
+    return (taxable_in_slab * rate).sum(axis=1)
+
+
+def apply_other_charges(annual_taxable, annual_tax, other_charges):
+    """
+    Add the Income Tax Slab's other taxes and charges, same rules as HRMS: each adds a
+    percent of the tax so far (so they compound), applied when the annual taxable amount
+    is inside its min/max taxable income (a bound of 0 is not checked).
+
+    other_charges: array of (percent, min_taxable_income, max_taxable_income) rows
+    """
+    other_charges = np.asarray(other_charges, dtype=float).reshape(-1, 3)
+    annual_taxable = np.asarray(annual_taxable, dtype=float)
+    annual_tax = np.asarray(annual_tax, dtype=float)
+    if not len(other_charges):
+        return annual_tax
+
+    percent, minimum, maximum = other_charges[:, 0], other_charges[:, 1], other_charges[:, 2]
+
+    # employees x charges
+    income = annual_taxable[:, None]
+    applies = ((minimum == 0) | (income >= minimum)) & ((maximum == 0) | (income <= maximum))
+    factors = np.where(applies, 1 + percent / 100, 1)
+
+    return annual_tax * factors.prod(axis=1)
+
+
+def project_paye(
+    current_taxable,
+    exemptions,
+    previous_taxable,
+    previous_paid_taxes,
+    remaining_periods,
+    slabs,
+    include_13th_month=True,
+    tax_periods=None,
+    other_charges=None,
+):
+    """
+    Project the PAYE of many employees in one pass. All array arguments are aligned by
+    employee; remaining_periods counts the current period. other_charges are the slab's
+    other taxes and charges (see apply_other_charges).
+
+    With tax_periods (e.g. 13) the remaining tax is divided by that fixed number of periods
+    instead of the remaining ones, as the legacy 13-period override does.
+    """
+    current_taxable = np.asarray(current_taxable, dtype=float)
+    remaining_periods = np.maximum(np.asarray(remaining_periods, dtype=float), 1)
+    previous_paid_taxes = np.asarray(previous_paid_taxes, dtype=float)
+
+    future_periods = remaining_periods + (1 if include_13th_month else 0)
+    annual_taxable = np.maximum(
+        np.asarray(previous_taxable, dtype=float) + current_taxable * future_periods - np.asarray(exemptions, dtype=float),
+        0
+    )
+    annual_tax = compute_slab_tax(annual_taxable, slabs)
+    if other_charges is not None:
+        annual_tax = apply_other_charges(annual_taxable, annual_tax, other_charges)
+
+    divisor = tax_periods or remaining_periods
+    current_tax = np.maximum((annual_tax - previous_paid_taxes) / divisor, 0)
+
+    return {
+        "annual_taxable": annual_taxable,
+        "annual_tax": annual_tax,
+        "current_tax": current_tax,
+    }
+
+
+@frappe.whitelist()
+def preview_payroll_entry(payroll_entry, tolerance=1, tax_periods=None):
+    """
+    Project the PAYE of every salary slip of a Payroll Entry and compare it with the tax
+    computed on the slips. Returns totals and the slips that differ by more than tolerance.
+
+    Pass tax_periods=13 on sites that register the legacy 13-period override
+    (paye.salary_slip_overrides), which divides the remaining tax by a fixed 13 periods.
+    Conditional slabs and additional (non-structured) earnings are not projected.
+    """
+    frappe.has_permission("Payroll Entry", "read", payroll_entry, throw=True)
+
+    inputs = get_payroll_entry_inputs(payroll_entry)
+    if not inputs:
+        return {"employees": 0, "total_tax": 0, "mismatches": []}
+
+    projected = np.zeros(len(inputs))
+    for slab, indexes in group_by_slab(inputs).items():
+        rows = [inputs[i] for i in indexes]
+        result = project_paye(
+            [row.current_taxable for row in rows],
+            [row.exemptions for row in rows],
+            [row.previous_taxable for row in rows],
+            [row.previous_paid_taxes for row in rows],
+            [row.remaining_periods for row in rows],
+            get_slabs(slab),
+            include_13th_month=bool(rows[0].enable_13th_month_tax),
+            tax_periods=cint(tax_periods) or None,
+            other_charges=get_other_charges(slab),
+        )
+        projected[indexes] = result["current_tax"]
+
+    slip_tax = np.array([flt(row.current_month_income_tax) for row in inputs])
+    differs = np.abs(projected - slip_tax) > flt(tolerance)
+
+    return {
+        "employees": len(inputs),
+        "total_tax": flt(projected.sum(), 2),
+        "mismatches": [
+            {
+                "salary_slip": inputs[i].salary_slip,
+                "employee": inputs[i].employee,
+                "projected_tax": flt(projected[i], 2),
+                "slip_tax": flt(slip_tax[i], 2),
+            }
+            for i in np.flatnonzero(differs)
+        ],
+    }
+
+
+def get_payroll_entry_inputs(payroll_entry):
+    """Per-slip projection inputs of a Payroll Entry, read with set-based queries"""
+    entry = frappe.db.get_value(
+        "Payroll Entry", payroll_entry, ["company", "start_date", "end_date"], as_dict=True
+    )
+    period = frappe.db.get_value(
+        "Payroll Period",
+        {"company": entry.company, "start_date": ["<=", entry.start_date], "end_date": [">=", entry.end_date]},
+        ["start_date", "end_date"],
+        as_dict=True
+    )
+    if not period:
+        frappe.throw(_("No Payroll Period found for {0}").format(entry.start_date))
+
+    slips = frappe.db.sql("""
+        SELECT
+            name AS salary_slip,
+            employee,
+            gross_pay - IFNULL(non_taxable_earnings, 0)
+                - IFNULL(deductions_before_tax_calculation, 0) AS current_taxable,
+            IFNULL(standard_tax_exemption_amount, 0)
+                + IFNULL(tax_exemption_declaration, 0) AS exemptions,
+            current_month_income_tax
+        FROM `tabSalary Slip`
+        WHERE payroll_entry = %(payroll_entry)s AND docstatus < 2
+    """, {"payroll_entry": payroll_entry}, as_dict=1)
+    if not slips:
+        return []
+
+    employees = [slip.employee for slip in slips]
+    previous = {
+        row.employee: row for row in frappe.db.sql("""
+            SELECT
+                employee,
+                SUM(gross_pay - IFNULL(non_taxable_earnings, 0)
+                    - IFNULL(deductions_before_tax_calculation, 0)) AS previous_taxable,
+                SUM(current_month_income_tax) AS previous_paid_taxes
+            FROM `tabSalary Slip`
+            WHERE employee IN %(employees)s
+                AND docstatus = 1
+                AND start_date >= %(period_start)s
+                AND end_date < %(start_date)s
+            GROUP BY employee
+        """, {"employees": employees, "period_start": period.start_date, "start_date": entry.start_date}, as_dict=1)
+    }
+    slab_by_employee = get_income_tax_slabs(employees, entry.start_date)
+    enable_13th_month_tax = frappe.get_cached_value("Company", entry.company, "enable_13th_month_tax")
+    remaining_periods = month_diff(period.end_date, entry.start_date)
+
+    for slip in slips:
+        paid = previous.get(slip.employee) or frappe._dict()
+        slip.previous_taxable = flt(paid.previous_taxable)
+        slip.previous_paid_taxes = flt(paid.previous_paid_taxes)
+        slip.current_taxable = flt(slip.current_taxable)
+        slip.exemptions = flt(slip.exemptions)
+        slip.remaining_periods = remaining_periods
+        slip.income_tax_slab = slab_by_employee.get(slip.employee)
+        slip.enable_13th_month_tax = enable_13th_month_tax
+
+    return slips
+
+
+def get_income_tax_slabs(employees, on_date):
+    """Income Tax Slab of each employee's latest Salary Structure Assignment"""
+    rows = frappe.db.sql("""
+        SELECT ssa.employee, ssa.income_tax_slab
+        FROM `tabSalary Structure Assignment` ssa
+        WHERE ssa.employee IN %(employees)s
+            AND ssa.docstatus = 1
+            AND ssa.from_date <= %(on_date)s
+        ORDER BY ssa.from_date ASC
+    """, {"employees": employees, "on_date": getdate(on_date)}, as_dict=1)
+
+    # Later assignments overwrite earlier ones
+    return {row.employee: row.income_tax_slab for row in rows}
+
+
+def group_by_slab(inputs):
+    groups = {}
+    for index, row in enumerate(inputs):
+        groups.setdefault(row.income_tax_slab, []).append(index)
+    return groups
+
+
+def get_slabs(income_tax_slab):
+    """(from, to, percent) rows of an Income Tax Slab; conditional slabs are not supported"""
+    if not income_tax_slab:
+        return []
+
+    return frappe.get_all(
+        "Taxable Salary Slab",
+        filters={"parent": income_tax_slab, "parenttype": "Income Tax Slab", "condition": ["is", "not set"]},
+        fields=["from_amount", "to_amount", "percent_deduction"],
+        order_by="from_amount asc",
+        as_list=True
+    )
+
+
+def get_other_charges(income_tax_slab):
+    """(percent, min, max taxable income) rows of an Income Tax Slab's other taxes and charges"""
+    if not income_tax_slab:
+        return []
+
+    return frappe.get_all(
+        "Income Tax Slab Other Charges",
+        filters={"parent": income_tax_slab, "parenttype": "Income Tax Slab"},
+        fields=["percent", "min_taxable_income", "max_taxable_income"],
+        as_list=True
+    )
@@ -0,0 +1,250 @@
+"""
+Sharded salary slip creation for a Payroll Entry.
+
+Employees are split into shards, each shard is a separate job on the long queue so the
+run scales with the number of workers. Shard progress is kept in a Redis hash per
+Payroll Entry; failed shards are retried automatically up to MAX_ATTEMPTS and can be
+retried manually after that, as can shards whose job died without finishing. Once every
+shard has finished, a merge step sets the Payroll Entry status and reports the employees
+that could not be processed.
+"""
+
+import frappe
+from frappe import _
+from frappe.utils import cint
+from frappe.utils.background_jobs import is_job_enqueued
+
+from paye.payroll.context import prepare_payroll_run_context
+
+DEFAULT_SHARDS = 4
+MAX_SHARDS = 32
+MAX_ATTEMPTS = 3
+# Commit every n slips so a failing shard keeps the slips it already created
+COMMIT_EVERY = 50
+FINISHED = ("Completed", "Failed")
+
+
+def get_state_key(payroll_entry):
+    return f"paye_payroll_shards:{payroll_entry}"
+
+
+@frappe.whitelist()
+def create_salary_slips_sharded(payroll_entry, shards=DEFAULT_SHARDS):
+    """Split the Payroll Entry's employees into shards and queue one job per shard"""
+    doc = frappe.get_doc("Payroll Entry", payroll_entry)
+    doc.check_permission("write")
+    if doc.docstatus != 1:
+        frappe.throw(_("Submit {0} before creating its Salary Slips").format(payroll_entry))
+
+    employees = [row.employee for row in doc.employees]
+    if not employees:
+        frappe.throw(_("No employees found in {0}").format(payroll_entry))
+
+    shards = max(1, min(cint(shards) or DEFAULT_SHARDS, MAX_SHARDS, len(employees)))
+    key = get_state_key(payroll_entry)
+    frappe.cache.delete_value(key)
+
+    for shard_id in range(shards):
+        frappe.cache.hset(key, str(shard_id), {
+            "employees": employees[shard_id::shards],
+            "status": "Queued",
+            "job_id": get_job_id(payroll_entry, shard_id, 0),
+            "attempts": 0,
+            "processed": 0,
+            "failed": [],
+        })
+
+    doc.db_set("status", "Queued")
+    for shard_id in range(shards):
+        enqueue_shard(payroll_entry, shard_id)
+
+    return get_progress(payroll_entry)
+
+
+def get_job_id(payroll_entry, shard_id, attempt):
+    # The attempt is part of the id: a retry is queued from the job it replaces, which is
+    # still running under the previous id and would otherwise drop it as a duplicate
+    return f"paye_payroll_shard:{payroll_entry}:{shard_id}:{attempt}"
+
+
+def enqueue_shard(payroll_entry, shard_id, attempt=0):
+    frappe.enqueue(
+        "paye.payroll.sharded.process_shard",
+        queue="long",
+        timeout=3600,
+        job_id=get_job_id(payroll_entry, shard_id, attempt),
+        deduplicate=True,
+        enqueue_after_commit=True,
+        payroll_entry=payroll_entry,
+        shard_id=str(shard_id)
+    )
+
+
+def process_shard(payroll_entry, shard_id):
+    key = get_state_key(payroll_entry)
+    shard = frappe.cache.hget(key, shard_id)
+    if not shard or shard["status"] == "Completed":
+        return
+
+    shard.update(status="Running", attempts=shard["attempts"] + 1, processed=0, failed=[])
+    frappe.cache.hset(key, shard_id, shard)
+
+    try:
+        create_shard_salary_slips(payroll_entry, key, shard_id, shard)
+    except Exception:
+        # Context setup, a commit or the job timeout failed the whole shard: without this
+        # it would stay Running and the Payroll Entry would never be merged
+        frappe.db.rollback()
+        frappe.log_error(f"Salary Slip shard {shard_id} failed", reference_doctype="Payroll Entry",
+            reference_name=payroll_entry)
+        shard["failed"] = get_employees_without_slip(payroll_entry, shard["employees"])
+
+    finish_shard(payroll_entry, key, shard_id, shard)
+
+
+def create_shard_salary_slips(payroll_entry, key, shard_id, shard):
+    doc = frappe.get_doc("Payroll Entry", payroll_entry)
+    employees = shard["employees"]
+    prepare_payroll_run_context(payroll_entry, doc.company, employees, doc.start_date, doc.end_date)
+
+    # Slips created by an earlier attempt are not created again
+    existing = set(employees) - set(get_employees_without_slip(payroll_entry, employees))
+    args = get_salary_slip_args(doc)
+    # Same flag the Payroll Entry sets while it creates slips itself
+    frappe.flags.via_payroll_entry = True
+
+    for index, employee in enumerate(employees, 1):
+        if employee not in existing:
+            frappe.db.savepoint("paye_salary_slip")
+            try:
+                frappe.get_doc({**args, "doctype": "Salary Slip", "employee": employee}).insert()
+            except Exception:
+                frappe.db.rollback(save_point="paye_salary_slip")
+                frappe.log_error(f"Salary Slip creation failed for {employee}", reference_doctype="Payroll Entry",
+                    reference_name=payroll_entry)
+                shard["failed"].append(employee)
+
+        shard["processed"] = index
+        if index % COMMIT_EVERY == 0:
+            frappe.db.commit()
+            frappe.cache.hset(key, shard_id, shard)
+
+    frappe.db.commit()
+
+
+def finish_shard(payroll_entry, key, shard_id, shard):
+    if shard["failed"] and shard["attempts"] < shard.get("max_attempts", MAX_ATTEMPTS):
+        queue_shard(payroll_entry, key, shard_id, shard)
+        # Also runs the enqueue after the rollback of a failed shard
+        frappe.db.commit()
+        return
+
+    shard["status"] = "Failed" if shard["failed"] else "Completed"
+    frappe.cache.hset(key, shard_id, shard)
+
+    merge_shards(payroll_entry)
+
+
+def queue_shard(payroll_entry, key, shard_id, shard):
+    shard.update(status="Queued", job_id=get_job_id(payroll_entry, shard_id, shard["attempts"]))
+    frappe.cache.hset(key, shard_id, shard)
+    enqueue_shard(payroll_entry, shard_id, shard["attempts"])
+
+
+def is_shard_job_alive(shard):
+    return bool(shard.get("job_id")) and is_job_enqueued(shard["job_id"])
+
+
+def get_employees_without_slip(payroll_entry, employees):
+    existing = set(frappe.get_all(
+        "Salary Slip",
+        filters={"payroll_entry": payroll_entry, "employee": ["in", employees], "docstatus": ["<", 2]},
+        pluck="employee"
+    ))
+    return [employee for employee in employees if employee not in existing]
+
+
+def merge_shards(payroll_entry):
+    """Final step once every shard has finished; safe to run more than once"""
+    progress = get_progress(payroll_entry)
+    if not progress["shards"] or any(shard["status"] not in FINISHED for shard in progress["shards"]):
+        return
+
+    doc = frappe.get_doc("Payroll Entry", payroll_entry)
+    if progress["failed"]:
+        doc.db_set({
+            "status": "Failed",
+            "error_message": _("Salary Slips could not be created for: {0}").format(", ".join(progress["failed"]))
+        })
+    else:
+        doc.db_set({"status": "Submitted", "salary_slips_created": 1, "error_message": ""})
+
+    frappe.db.commit()
+    frappe.publish_realtime(
+        "completed_salary_slip_creation",
+        {"payroll_entry": payroll_entry, "failed": progress["failed"]},
+        doctype="Payroll Entry",
+        docname=payroll_entry
+    )
+
+
+@frappe.whitelist()
+def retry_failed_shards(payroll_entry):
+    """
+    Queue failed shards again, and shards left Queued or Running by a job that is gone
+    (killed worker, lost job). Their existing slips are kept.
+    """
+    frappe.get_doc("Payroll Entry", payroll_entry).check_permission("write")
+
+    key = get_state_key(payroll_entry)
+    for shard_id, shard in (frappe.cache.hgetall(key) or {}).items():
+        if shard["status"] == "Completed" or (shard["status"] != "Failed" and is_shard_job_alive(shard)):
+            continue
+        shard_id = frappe.safe_decode(shard_id)
+        # Attempts keep counting so the job ids stay unique, MAX_ATTEMPTS starts over
+        shard["max_attempts"] = shard["attempts"] + MAX_ATTEMPTS
+        queue_shard(payroll_entry, key, shard_id, shard)
+
+    return get_progress(payroll_entry)
+
+
+@frappe.whitelist()
+def get_progress(payroll_entry):
+    frappe.has_permission("Payroll Entry", "read", payroll_entry, throw=True)
+
+    shards = []
+    state = frappe.cache.hgetall(get_state_key(payroll_entry)) or {}
+    for shard_id, shard in sorted(state.items(), key=lambda item: cint(frappe.safe_decode(item[0]))):
+        shard_id = frappe.safe_decode(shard_id)
+        shards.append({
+            "shard": shard_id,
+            "status": shard["status"],
+            "attempts": shard["attempts"],
+            "employees": len(shard["employees"]),
+            "processed": shard["processed"],
+            "failed": shard["failed"],
+        })
+
+    return {
+        "shards": shards,
+        "employees": sum(shard["employees"] for shard in shards),
+        "processed": sum(shard["processed"] for shard in shards),
+        "failed": [employee for shard in shards for employee in shard["failed"]],
+    }
+
+
+def get_salary_slip_args(doc):
+    """Same slip values the Payroll Entry passes when it creates slips itself"""
+    return {
+        "salary_slip_based_on_timesheet": doc.salary_slip_based_on_timesheet,
+        "payroll_frequency": doc.payroll_frequency,
+        "start_date": doc.start_date,
+        "end_date": doc.end_date,
+        "company": doc.company,
+        "posting_date": doc.posting_date,
+        "deduct_tax_for_unclaimed_employee_benefits": doc.deduct_tax_for_unclaimed_employee_benefits,
+        "deduct_tax_for_unsubmitted_tax_exemption_proof": doc.deduct_tax_for_unsubmitted_tax_exemption_proof,
+        "payroll_entry": doc.name,
+        "exchange_rate": doc.exchange_rate,
+        "currency": doc.currency,
+    }
@@ -3,13 +3,15 @@ from erpnext.setup.doctype.company.company import Company
 from hrms.payroll.doctype.salary_slip.salary_slip import SalarySlip
 from frappe.utils import flt
 
+from paye.payroll.context import get_payroll_run_context
+
 class CustomSalarySlip(SalarySlip):
     def calculate_variable_tax(self, tax_component, has_additional_salary_tax_component=False):
         """
         Override to support 13-month tax distribution for Mauritius PAYE
         """
-        # Get custom tax periods from Company or Payroll Settings
-        company = frappe.get_cached_value("Company", self.company, ["annual_tax_periods", "country"], as_dict=True)
+        # Company flags come from the payroll run context shared by all slips of the run
+        company = get_payroll_run_context(self).company
         
         # For Mauritius, use 13 periods, else use default 12
         tax_periods = 13 # if company and company.get("country") == "Mauritius" else 12
@@ -45,7 +47,7 @@ class CustomSalarySlip(SalarySlip):
         period_factor, remaining_sub_periods = get_period_factor(*args, **kwargs)
         
         # Adjust for 13-month system if company is in Mauritius
-        company_country = frappe.get_cached_value("Company", self.company, "country")
+        company_country = get_payroll_run_context(self).company.country
         if company_country == "Mauritius":
             # Convert 12-month factor to 13-month factor
             payroll_frequency = kwargs.get('payroll_frequency') or self.payroll_frequency